@@ -16,9 +16,13 @@ from mufem.electromagnetics.timedomainmagnetic import (
 
 from pathlib import Path
 import matplotlib.pyplot as plt
+import sys
 
 dir_path = Path(__file__).resolve().parent
 
+sys.path.append(str(dir_path.parents[1]))
+
+from common.probes import LineProbe  # noqa: E402
 
 sim = mufem.Simulation.New(name="Team-13", mesh_path=f"{dir_path}/geometry.mesh")
 
@@ -93,20 +97,10 @@ sim.run()
 # flake8: noqa: FKA100
 
 
-x_vals = numpy.linspace(0.01, 0.11, 23, endpoint=True)
-b_vals = []
-
-
-for x in x_vals:
-
-    probe_report = mufem.ProbeReport.SinglePoint(
-        "B", "Magnetic Flux Density", x=x, y=0.02, z=0.055
-    )
-
-    b = probe_report.evaluate().mag
-
-    b_vals.append(b)
+line = LineProbe(start=(0.01, 0.02, 0.055), end=(0.11, 0.02, 0.055), num=23)
 
+x_vals = line.points[:, 0]
+b_vals = numpy.linalg.norm(line.evaluate(cff_name="Magnetic Flux Density"), axis=1)
 
 res = numpy.column_stack((x_vals, b_vals))
 ref = numpy.loadtxt(
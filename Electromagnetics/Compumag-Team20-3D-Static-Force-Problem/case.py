@@ -1,5 +1,7 @@
+import argparse
 import matplotlib.pyplot as plt
 import numpy
+import sys
 
 from mufem import Bnd, Vol, SteadyRunner, CffConstantScalar, Simulation
 from mufem.electromagnetics.coil import (
@@ -16,12 +18,19 @@ from mufem.electromagnetics.timedomainmagnetic import (
     TimeDomainMagneticModel,
 )
 
-from typing import List
-
 from pathlib import Path
 
 dir_path = Path(__file__).resolve().parent
 
+sys.path.append(str(dir_path.parents[1]))
+
+from common.checkpoint import SweepCheckpoint  # noqa: E402
+from common.results import ResultsWriter  # noqa: E402
+
+# With --resume a scan which was stopped continues after the last completed current.
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument("--resume", action="store_true")
+args, _ = parser.parse_known_args()
 
 sim = Simulation.New(
     name="Compumag-Team20-3D-Static-Force-Problem",
@@ -92,17 +101,49 @@ magnetic_force_report_1 = MagneticForceReport(name="Pole Force", marker="Pole" @
 
 # Run the scan
 
-center_piece_force_list: List[float] = []
+is_main_process = sim.get_machine().is_main_process()
+
+checkpoint = SweepCheckpoint(
+    path=f"{dir_path}/results/Force_vs_Current.checkpoint.json",
+    resume=args.resume,
+    enabled=is_main_process,
+)
+
+results = ResultsWriter(
+    path=f"{dir_path}/results/Force_vs_Current.csv",
+    columns=("coil_current", "force_z"),
+    header="coil current [A], pole force z (quarter model) [N]",
+    resume=args.resume,
+    keep_rows=checkpoint.rows,
+    enabled=is_main_process,
+)
+
+# Every current starts from the solution of the previous one. After --resume the
+# last completed current is solved again (without recording it), so that the
+# first pending current starts from the same solution as in an uninterrupted scan.
+skipped_current = None
 
 for coil_current in numpy.linspace(0.0, 5.0, 11):
 
+    if coil_current in checkpoint:
+        skipped_current = coil_current
+        continue
+
+    if skipped_current is not None:
+        coil_drive_current.set_value(skipped_current)
+        steady_runner.advance(5)
+        skipped_current = None
+
     coil_drive_current.set_value(coil_current)
 
     steady_runner.advance(5)
 
     force_z = magnetic_force_report_1.evaluate().z
 
-    center_piece_force_list.append((coil_current, force_z))
+    results.write(coil_current, force_z)
+    checkpoint.complete(key=coil_current, results=results)
+
+results.close()
 
 
 # Plot the results
@@ -111,7 +152,7 @@ plt.clf()
 
 symmetry_factor = 4.0
 
-calculated = numpy.array(center_piece_force_list)
+calculated = results.to_numpy()
 
 reference = numpy.loadtxt(
     f"{dir_path}/data/ReferenceForce.csv", delimiter=",", comments="#"
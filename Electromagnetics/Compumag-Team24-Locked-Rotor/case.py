@@ -1,3 +1,6 @@
+import argparse
+import sys
+
 import matplotlib.pyplot as plt
 import numpy
 from pathlib import Path
@@ -24,11 +27,19 @@ from mufem.electromagnetics.timedomainmagnetic import (
 
 # Enable this to output the data per time step for animation
 # make sure that the directory vis exists.
-output_for_animation = False
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument("--output_for_animation", action="store_true")
+parser.add_argument("--export_every", type=int, default=1)
+args, _ = parser.parse_known_args()
+output_for_animation = args.output_for_animation
 
 
 dir_path = Path(__file__).resolve().parent
 
+sys.path.append(str(dir_path.parents[1]))
+
+from common.exports import ThrottledFieldExporter  # noqa: E402
+
 sim = mufem.Simulation.New(name="Team-24", mesh_path=f"{dir_path}/geometry.mesh")
 
 unsteady_runner = mufem.UnsteadyRunner(
@@ -152,19 +163,32 @@ if output_for_animation:
     refinement_model = mufem.RefinementModel()
     sim.get_model_manager().add_model(refinement_model)
 
-    # We save a few fields so we can visualize with paraview
-    field_exporter = sim.get_field_exporter()
+    # We save a few fields so we can visualize with paraview, only on every
+    # `export_every`-th time step to save disk space and time.
+    field_exporter = ThrottledFieldExporter(
+        sim.get_field_exporter(),
+        every=args.export_every,
+        enabled=sim.get_machine().is_main_process(),
+    )
     field_exporter.add_field_output("Electric Current Density")
     field_exporter.add_field_output("Magnetic Flux Density")
     field_exporter.add_field_output("Element Type")
 
-    field_exporter.save()
+    # Save the fields for visualization, with the coil current and rotor torque
+    field_exporter.save(
+        time=0.0,
+        coil_current=coil_current_report.evaluate(),
+        rotor_torque=magnetic_torque_report.evaluate().z,
+    )
 
     for i in range(30):
         unsteady_runner.advance(1)
 
-        # Save the fields for visualization
-        field_exporter.save()
+        field_exporter.save(
+            time=magnetic_torque_monitor.get_values()[-1][0],
+            coil_current=coil_current_report.evaluate(),
+            rotor_torque=magnetic_torque_report.evaluate().z,
+        )
 
 else:
 
@@ -221,10 +245,11 @@ torque_ref = numpy.loadtxt(
 
 if output_for_animation:
 
-    for i in range(31):
+    # One frame per saved output, `step` is the number of time steps before it.
+    for i, step in enumerate(field_exporter.steps):
 
         xy_plot(
-            values=current_values[: i + 1],
+            values=current_values[: step + 1],
             reference=coil_current_ref,
             xlabel="Time [s]",
             ylabel="Coil Current [A]",
@@ -235,7 +260,7 @@ if output_for_animation:
         )
 
         xy_plot(
-            values=torque_values[: i + 1],
+            values=torque_values[: step + 1],
             reference=torque_ref,
             xlabel="Time [s]",
             ylabel="Rotor Torque [Nm]",
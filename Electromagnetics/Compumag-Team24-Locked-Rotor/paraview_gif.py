@@ -1,13 +1,26 @@
 import paraview.simple as pvs
 
-import subprocess
+import argparse
+import sys
+from pathlib import Path
 
+dir_path = Path(__file__).resolve().parent
 
-def create_scene(index: int, show: bool = False):
+sys.path.append(str(dir_path.parents[1]))
+
+from common.animation import encode_animation, render_frames  # noqa: E402
+from common.exports import read_series_metadata  # noqa: E402
+
+
+def data_file(index: int) -> str:
+    return f"{dir_path}/VisualizationOutput/Output_{index}.vtpc"
 
-    # flake8: noqa: FKA100
 
-    import os
+def load_data(index: int):
+    """Builds the view, reader and color map once, the frames then only swap the
+    file read, see `visualize_and_save`."""
+
+    # flake8: noqa: FKA100
 
     renderView1 = pvs.CreateView("RenderView")
 
@@ -24,9 +37,7 @@ def create_scene(index: int, show: bool = False):
 
     pvs._DisableFirstRenderCameraReset()
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    data = pvs.OpenDataFile(f"{script_dir}/VisualizationOutput/Output_{index}.vtpc")
+    data = pvs.OpenDataFile(data_file(index))
 
     # show data from data
     dataDisplay = pvs.Show(data, renderView1, "UnstructuredGridRepresentation")
@@ -51,6 +62,9 @@ def create_scene(index: int, show: bool = False):
     ctf.ApplyPreset("Cool to Warm")
     ctf.RescaleTransferFunction(0, 3.0e5)
 
+    # Keep the range fixed when the data of the next frame is read.
+    ctf.AutomaticRescaleRangeMode = "Never"
+
     scalar_bar = pvs.GetScalarBar(ctf)
     scalar_bar.Orientation = "Horizontal"
     scalar_bar.WindowLocation = "Any Location"
@@ -69,17 +83,41 @@ def create_scene(index: int, show: bool = False):
     scalar_bar.ScalarBarLength = 0.3
     scalar_bar.ScalarBarThickness = 40
 
-    pvs.Render()
+    return {"view": renderView1, "data": data}
+
+
+def visualize_and_save(state, index: int):
+
+    view = state["view"]
+    data = state["data"]
+
+    data.FileName = data_file(index)
+
+    pvs.UpdatePipeline(proxy=data)
+    pvs.Render(view)
     pvs.SaveScreenshot(
         f"vis/Scene_Electric_Current_Density_{index:03d}.png",
+        view,
         OverrideColorPalette="WhiteBackground",
     )
 
 
-from PIL import Image
+# The pipeline of a rendering process, see `initialize_worker`.
+worker = {}
 
 
-def combine_images(large_path, small1_path, small2_path, output_path):
+def initialize_worker():
+    worker["state"] = load_data(0)
+
+
+def create_scene(index: int):
+    visualize_and_save(worker["state"], index)
+
+
+from PIL import Image  # noqa: E402
+
+
+def combine_images(large_path, small1_path, small2_path):
     large = Image.open(large_path)
     small1 = Image.open(small1_path)
     small2 = Image.open(small2_path)
@@ -102,36 +140,44 @@ def combine_images(large_path, small1_path, small2_path, output_path):
     out.paste(small1, (large.width, 0))
     out.paste(small2, (large.width, target_height))
 
-    out.save(output_path)
+    return out
 
 
 if __name__ == "__main__":
-    # Create the scene images with a siple name pattern:
-    for i in range(31):
-
-        create_scene(i)
-
-        combine_images(
-            large_path=f"vis/Scene_Electric_Current_Density_{i:03d}.png",
-            small1_path=f"vis/Coil_Current_vs_Time_{i:03d}.png",
-            small2_path=f"vis/Rotor_Torque_vs_Time_{i:03d}.png",
-            output_path=f"vis/Scene_{i:03d}.png",
-        )
-
-    # 1) Use ffmpeg to convert the images to an animated gif
-    commands = [
-        (
-            "ffmpeg -framerate 8 -i vis/Scene_%03d.png "
-            '-vf "pad=ceil(iw/2)*2:ceil(ih/2)*2" -c:v libx264 -pix_fmt yuv420p vis/output.mp4'
-        ),
-        (
-            "ffmpeg -i vis/output.mp4 "
-            "-vf 'fps=8,scale=800:-1:flags=lanczos' "
-            "-c:v gif results/Result_Animation.gif -y"
-        ),
-    ]
-    for command in commands:
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--force", action="store_true", help="Render all frames, not only new ones."
+    )
+    args = parser.parse_args()
+
+    # One frame per saved output.
+    frames = range(len(read_series_metadata(f"{dir_path}/VisualizationOutput")))
+
+    # Render the scene images with a simple name pattern, skipping the ones which
+    # are newer than their data. Every worker builds the pipeline once and only
+    # reads the data of its frames:
+    render_frames(
+        render=create_scene,
+        frames=frames,
+        workers=args.workers,
+        initializer=initialize_worker,
+        outputs=lambda i: [f"vis/Scene_Electric_Current_Density_{i:03d}.png"],
+        inputs=lambda i: [data_file(i)],
+        force=args.force,
+    )
 
-        if result.returncode != 0:
-            print(result.stderr)
+    # Combine the images of every frame and stream them to ffmpeg:
+    encode_animation(
+        images=(
+            combine_images(
+                large_path=f"vis/Scene_Electric_Current_Density_{i:03d}.png",
+                small1_path=f"vis/Coil_Current_vs_Time_{i:03d}.png",
+                small2_path=f"vis/Rotor_Torque_vs_Time_{i:03d}.png",
+            )
+            for i in frames
+        ),
+        output_path="results/Result_Animation.gif",
+        framerate=8,
+        width=800,
+    )
@@ -15,10 +15,14 @@ from mufem import Vol
 
 import matplotlib.pyplot as plt
 import numpy
+import sys
 from pathlib import Path
 
 dir_path = Path(__file__).resolve().parent
 
+sys.path.append(str(dir_path.parents[1]))
+
+from common.probes import LineProbe  # noqa: E402
 
 sim = mufem.Simulation.New(name="Team-7", mesh_path=f"{dir_path}/geometry.mesh")
 
@@ -79,37 +83,22 @@ vis.save(order=3)
 
 # Post Process Results
 probe_reports = [("A1-B1", 0.072), ("A2-B2", 0.144)]
-x_values = numpy.linspace(start=0.0, stop=0.288, num=128)
 
 
 for probe in probe_reports:
 
-    b_values = []
-
-    for x in x_values:
-
-        magnetic_flux_density_real_report = mufem.ProbeReport.SinglePoint(
-            name="MagneticFluxDensityRealReport",
-            cff_name="Magnetic Flux Density-Real",
-            x=x,
-            y=probe[1],
-            z=0.034,
-        )
-
-        magnetic_flux_density_imag_report = mufem.ProbeReport.SinglePoint(
-            name="MagneticFluxDensityImagReport",
-            cff_name="Magnetic Flux Density-Imag",
-            x=x,
-            y=probe[1],
-            z=0.034,
-        )
+    # The same points are evaluated for the real and the imaginary part.
+    line = LineProbe(
+        start=(0.0, probe[1], 0.034), end=(0.288, probe[1], 0.034), num=128
+    )
 
-        b_real = magnetic_flux_density_real_report.evaluate()
-        b_imag = magnetic_flux_density_imag_report.evaluate()
+    x_values = line.points[:, 0]
+    b_real = line.evaluate(cff_name="Magnetic Flux Density-Real")
+    b_imag = line.evaluate(cff_name="Magnetic Flux Density-Imag")
 
-        # We multiply by 1e3 to convert from T to mT
-        # and by 1e3 to convert from m to mm
-        b_values.append((1e3 * x, 1e3 * (-b_real.z + 1j * b_imag.z)))
+    # We multiply by 1e3 to convert from T to mT
+    # and by 1e3 to convert from m to mm
+    b_values = list(zip(1e3 * x_values, 1e3 * (-b_real[:, 2] + 1j * b_imag[:, 2])))
 
     # Plot
     # flake8: noqa: FKA100
@@ -9,4 +9,5 @@ PYTHONPATH="$PARAVIEW_PATH/lib/python3.12/site-packages" \
   --input VisualizationOutput/Output.vtpc.series \
   --freq 50 \
   --size 1600x1200 \
-  --glyph-scale 2e-8
+  --glyph-scale 2e-8 \
+  "$@"
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import math
-import subprocess
+import sys
 from pathlib import Path
 
 import paraview
@@ -15,6 +15,10 @@ import numpy as np  # noqa: E402
 import matplotlib.pyplot as plt  # noqa: E402
 from PIL import Image  # noqa: E402
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.animation import encode_animation, render_frames  # noqa: E402
+
 pvs._DisableFirstRenderCameraReset()
 
 
@@ -163,9 +167,7 @@ def visualize_and_save(state, phase: float, index: int, outdir: Path):
     )
 
 
-def combine_images(
-    large_path: Path, small1_path: Path, small2_path: Path, output_path: Path
-):
+def combine_images(large_path: Path, small1_path: Path, small2_path: Path):
     large = Image.open(str(large_path))
     small1 = Image.open(str(small1_path))
     small2 = Image.open(str(small2_path))
@@ -186,7 +188,7 @@ def combine_images(
     out.paste(small1, (large.width, 0))
     out.paste(small2, (large.width, target_height))
 
-    out.save(str(output_path))
+    return out
 
 
 def create_plot(time_s: float, index: int, steps: int, outdir: Path, freq_hz: float):
@@ -265,29 +267,38 @@ def create_magnetic_flux_density_plot(step: int, phase: float):
     )
 
 
-def run_ffmpeg(outdir: Path):
+# The pipeline and settings of a rendering process, see `initialize_worker`.
+worker = {}
 
-    print("Creating animated GIF using ffmpeg...")
 
-    gif = outdir / "output.gif"
-    palette = outdir / "palette.png"
-    subprocess.run(
-        f'ffmpeg -y -framerate 8 -i "{outdir}/Scene_%03d.png" '
-        f'-vf "fps=8,scale=1200:-1:flags=lanczos,palettegen=stats_mode=full" "{palette}"',
-        shell=True,
-        text=True,
-        capture_output=True,
-        check=False,
-    )
-    subprocess.run(
-        f'ffmpeg -y -framerate 8 -i "{outdir}/Scene_%03d.png" -i "{palette}" '
-        f'-lavfi "fps=8,scale=1200:-1:flags=lanczos,paletteuse=dither=sierra2_4a" "{gif}"',
-        shell=True,
-        text=True,
-        capture_output=True,
-        check=False,
+def initialize_worker(args, width: int, height: int, outdir: Path):
+
+    worker["state"] = load_data(args.input, width, height, args.glyph_scale)
+    worker["args"] = args
+    worker["outdir"] = outdir
+
+
+def render_frame(index: int):
+
+    args = worker["args"]
+    outdir = worker["outdir"]
+
+    period_length = 1.0 / args.freq
+    dt = period_length / args.frames
+
+    time = index * dt
+    phase = 2.0 * math.pi * args.freq * time
+
+    phase_deg = phase * 180.0 / math.pi
+
+    print(
+        f"Creating plot for step {index:03d} at {phase_deg:.3f}deg / {time*1e3:.3f}ms"
     )
 
+    create_magnetic_flux_density_plot(index, phase)
+    visualize_and_save(worker["state"], phase, index, outdir)
+    create_plot(time, index, args.frames, outdir, args.freq)
+
 
 def main():
 
@@ -298,42 +309,48 @@ def main():
     ap.add_argument("--outdir", default="vis")
     ap.add_argument("--size", default="2374x1558")
     ap.add_argument("--glyph-scale", type=float, default=2e-8)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument(
+        "--force", action="store_true", help="Render all frames, not only new ones."
+    )
     args = ap.parse_args()
 
     width, height = [int(x) for x in args.size.lower().split("x")]
     outdir = Path(args.outdir).resolve()
     outdir.mkdir(parents=True, exist_ok=True)
 
-    state = load_data(args.input, width, height, args.glyph_scale)
-
-    period_length = 1.0 / args.freq
-    dt = period_length / args.frames
-
-    for index in range(args.frames):
-
-        time = index * dt
-        phase = 2.0 * math.pi * args.freq * time
-
-        phase_deg = phase * 180.0 / math.pi
-
-        print(
-            f"Creating plot for step {index:03d} at {phase_deg:.3f}deg / {time*1e3:.3f}ms"
-        )
-
-        create_magnetic_flux_density_plot(index, phase)
-        visualize_and_save(state, phase, index, outdir)
-        create_plot(time, index, args.frames, outdir, args.freq)
-
-    for i in range(args.frames):
+    # Every worker loads the data once and renders its frames with that pipeline,
+    # frames which are newer than the data are skipped.
+    render_frames(
+        render=render_frame,
+        frames=range(args.frames),
+        workers=args.workers,
+        initializer=initialize_worker,
+        initargs=(args, width, height, outdir),
+        outputs=lambda i: [
+            outdir / f"Scene_Electric_Current_Density_{i:03d}.png",
+            outdir / f"Coil_Current_{i:03d}.png",
+            f"vis/Magnetic_Flux_Density_{i:03d}.png",
+        ],
+        inputs=lambda i: [args.input, "results/Bz_A1-B1_mufem.csv"],
+        force=args.force,
+    )
 
-        combine_images(
-            large_path=outdir / f"Scene_Electric_Current_Density_{i:03d}.png",
-            small1_path=outdir / f"Coil_Current_{i:03d}.png",
-            small2_path=outdir / f"Magnetic_Flux_Density_{i:03d}.png",
-            output_path=outdir / f"Scene_{i:03d}.png",
-        )
+    print("Creating animated GIF using ffmpeg...")
 
-    run_ffmpeg(outdir)
+    encode_animation(
+        images=(
+            combine_images(
+                large_path=outdir / f"Scene_Electric_Current_Density_{i:03d}.png",
+                small1_path=outdir / f"Coil_Current_{i:03d}.png",
+                small2_path=outdir / f"Magnetic_Flux_Density_{i:03d}.png",
+            )
+            for i in range(args.frames)
+        ),
+        output_path=outdir / "output.gif",
+        framerate=8,
+        width=1200,
+    )
 
 
 if __name__ == "__main__":
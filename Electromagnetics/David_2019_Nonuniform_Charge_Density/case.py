@@ -1,10 +1,16 @@
 import numpy as np
 import math
 import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
 
 import mufem
 import mufem.electromagnetics.electrostatics as estat
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.probes import LineProbe  # noqa: E402
+
 # Setup the simulation -----------------------------------------------------------------
 sim = mufem.Simulation.New(
     name="Nonuniform Charge Density",
@@ -62,22 +68,11 @@ def theory(r):
 R = 10.0  # [m] sphere radius
 Nr = 500
 
-r = np.linspace(-R + 0.01, R - 0.01, Nr)
-E_mufem = np.zeros(Nr)
-E_theory = np.zeros(Nr)
-
-for i in range(Nr):
-    report = mufem.ProbeReport.SinglePoint(
-        name="Electric Field Report",
-        cff_name="Electric Field",
-        x=r[i],
-        y=0,
-        z=0,
-    )
-    E = report.evaluate()
-    E_mufem[i] = E.x
-
-    E_theory[i] = theory(r[i])
+line = LineProbe(start=(-R + 0.01, 0, 0), end=(R - 0.01, 0, 0), num=Nr)
+
+r = line.points[:, 0]
+E_mufem = line.evaluate(cff_name="Electric Field")[:, 0]
+E_theory = np.array([theory(ri) for ri in r])
 
 plt.figure(constrained_layout=True)
 plt.plot(r, E_theory / 1e9, "k-", label="Theory")
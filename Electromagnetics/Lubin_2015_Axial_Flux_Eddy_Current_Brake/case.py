@@ -17,6 +17,7 @@ import mufem
 
 from pathlib import Path
 import matplotlib.pyplot as plt
+import sys
 
 
 import argparse
@@ -24,6 +25,7 @@ import argparse
 # add near the existing `output_for_animation = True`
 parser = argparse.ArgumentParser(add_help=False)
 parser.add_argument("--output_for_animation", action="store_true")
+parser.add_argument("--export_every", type=int, default=1)
 args, _ = parser.parse_known_args()
 output_for_animation = args.output_for_animation
 
@@ -45,6 +47,11 @@ def create_report_and_monitor(sim, report, report_name: str, *args):
 
 dir_path = Path(__file__).resolve().parent
 
+sys.path.append(str(dir_path.parents[1]))
+
+from common.exports import ThrottledFieldExporter  # noqa: E402
+from common.results import ResultsWriter  # noqa: E402
+
 sim = mufem.Simulation.New(
     name="Lubin 2015: Axial-Flux Eddy Current Brake",
     mesh_path=f"{dir_path}/geometry.mesh",
@@ -166,14 +173,21 @@ plate_torque_report, plate_torque_monitor = create_report_and_monitor(
 )
 
 
-torque_vs_rpm = []
-torque_vs_rpm_step = []
+torque_vs_rpm = ResultsWriter(
+    path=f"{dir_path}/results/Torque_vs_RPM.csv",
+    columns=("rpm", "torque"),
+    header="slip speed [rpm], torque [Nm]",
+    enabled=is_main_process,
+)
 
 
 if output_for_animation:
 
-    # We save a few fields so we can visualize with focus-viewer/paraview
-    field_exporter = sim.get_field_exporter()
+    # We save a few fields so we can visualize with focus-viewer/paraview, only on
+    # every `export_every`-th time step to save disk space and time.
+    field_exporter = ThrottledFieldExporter(
+        sim.get_field_exporter(), every=args.export_every, enabled=is_main_process
+    )
     field_exporter.add_field_output("Electric Current Density")
     field_exporter.add_field_output("Magnetic Flux Density")
 
@@ -188,15 +202,22 @@ for rpm in [500, 1000, 2000]:
         for i in range(30):
             unsteady_runner.advance(1)
 
-            # Save the fields for visualization
-            field_exporter.save()
-            torque_vs_rpm_step.append((rpm, plate_torque_report.evaluate().z))
+            # Save the fields for visualization, one animation frame per output, with
+            # the rotation rate and torque, which the animation shows
+            field_exporter.save(
+                time=plate_torque_monitor.get_values()[-1][0],
+                rpm=rpm,
+                torque=plate_torque_report.evaluate().z,
+            )
 
     else:
 
         unsteady_runner.advance(20)
 
-    torque_vs_rpm.append((rpm, plate_torque_report.evaluate().z))
+    torque_vs_rpm.write(rpm, plate_torque_report.evaluate().z)
+    torque_vs_rpm.flush()
+
+torque_vs_rpm.close()
 
 
 time_torque = sim.get_monitor_manager().get_monitor("Plate Torque").get_values()
@@ -225,7 +246,7 @@ ref = numpy.loadtxt(
 )
 
 plt.plot(ref[:, 0], ref[:, 1], "k-", label="Reference", linewidth=3.0)
-plt.plot(*zip(*torque_vs_rpm), "ro", label="$\\mu$fem", markersize=10.0)
+plt.plot(*zip(*torque_vs_rpm.rows), "ro", label="$\\mu$fem", markersize=10.0)
 
 plt.xlabel("Slip Speed [rpm]", fontsize=16)
 plt.ylabel("Torque [Nm]", fontsize=16)
@@ -255,7 +276,9 @@ plt.savefig(f"{dir_path}/results/Torque_vs_RPM.png", dpi=200)
 if output_for_animation:
     # flake8: noqa: FKA100
 
-    for n, (rpm, torque) in enumerate(torque_vs_rpm_step):
+    for n, output in enumerate(field_exporter.outputs):
+
+        rpm = output["rpm"]
 
         plt.clf()
 
@@ -264,7 +287,7 @@ if output_for_animation:
         )
 
         plt.plot(ref[:, 0], ref[:, 1], "k-", label="Reference", linewidth=3.0)
-        plt.plot(*zip(*torque_vs_rpm), "ro", label="$\\mu$fem", markersize=10.0)
+        plt.plot(*zip(*torque_vs_rpm.rows), "ro", label="$\\mu$fem", markersize=10.0)
 
         plt.xlabel("Slip Speed [rpm]", fontsize=16)
         plt.ylabel("Torque [Nm]", fontsize=16)
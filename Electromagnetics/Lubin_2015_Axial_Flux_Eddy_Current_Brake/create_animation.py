@@ -1,10 +1,21 @@
-import subprocess
+import argparse
+import sys
+from pathlib import Path
 
 # flake8: noqa: FKA100
 from PIL import Image
 
+dir_path = Path(__file__).resolve().parent
 
-def create_scene(index: int, rpm: int):
+sys.path.append(str(dir_path.parents[1]))
+
+from common.animation import encode_animation, render_frames  # noqa: E402
+from common.exports import read_series_metadata  # noqa: E402
+
+
+def create_scene(frame):
+
+    index, rpm = frame
 
     import focus_viewer  # type: ignore[import-not-found]
     import os
@@ -71,9 +82,7 @@ def create_scene(index: int, rpm: int):
     viewer.save_screenshot(f"vis/Scene_Electric_Current_Density_{index:03d}.png")
 
 
-def combine_images(
-    large_path, small1_path, output_path, small_scale=0.9, right_padding=80
-):
+def combine_images(large_path, small1_path, small_scale=0.9, right_padding=80):
     large = Image.open(large_path)
     small1 = Image.open(small1_path)
 
@@ -99,38 +108,48 @@ def combine_images(
 
     out = out.crop((100, 0, out.width - 100, out.height))
 
-    out.save(output_path)
+    return out
 
 
 if __name__ == "__main__":
 
-    # 90 is currently hard-coded to three rotation rates each for 30 time steps
-    for i in range(90):
-
-        rpm = [500, 1000, 2000][i // 30]
-
-        create_scene(i, rpm)
-        combine_images(
-            large_path=f"vis/Scene_Electric_Current_Density_{i:03d}.png",
-            small1_path=f"vis/Torque_vs_RPM_{i:03d}.png",
-            output_path=f"vis/Scene_{i:03d}.png",
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--force", action="store_true", help="Render all frames, not only new ones."
+    )
+    args = parser.parse_args()
+
+    # One frame per saved output, with the rotation rate it was saved at.
+    frames = [
+        (i, output["rpm"])
+        for i, output in enumerate(
+            read_series_metadata(f"{dir_path}/VisualizationOutput")
         )
-
-    # 1) Use ffmpeg to convert the images to an animated gif
-
-    commands = [
-        (
-            "ffmpeg -framerate 8 -i vis/Scene_%03d.png "
-            '-vf "pad=ceil(iw/2)*2:ceil(ih/2)*2" -c:v libx264 -pix_fmt yuv420p vis/output.mp4'
-        ),
-        (
-            "ffmpeg -i vis/output.mp4 "
-            "-vf 'fps=8,scale=800:-1:flags=lanczos' "
-            "-c:v gif results/Result_Animation.gif -y"
-        ),
     ]
-    for command in commands:
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
 
-        if result.returncode != 0:
-            print(result.stderr)
+    # Render the scenes, skipping the ones which are newer than their data:
+    render_frames(
+        render=create_scene,
+        frames=frames,
+        workers=args.workers,
+        outputs=lambda frame: [
+            f"vis/Scene_Electric_Current_Density_{frame[0]:03d}.png"
+        ],
+        inputs=lambda frame: [f"{dir_path}/VisualizationOutput/Output_{frame[0]}.vtpc"],
+        force=args.force,
+    )
+
+    # Combine the images of every frame and stream them to ffmpeg:
+    encode_animation(
+        images=(
+            combine_images(
+                large_path=f"vis/Scene_Electric_Current_Density_{i:03d}.png",
+                small1_path=f"vis/Torque_vs_RPM_{i:03d}.png",
+            )
+            for i, _ in frames
+        ),
+        output_path="results/Result_Animation.gif",
+        framerate=8,
+        width=800,
+    )
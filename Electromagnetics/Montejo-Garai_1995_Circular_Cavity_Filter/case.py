@@ -1,5 +1,8 @@
+import argparse
 import matplotlib.pyplot as plt
 import numpy
+import sys
+from pathlib import Path
 
 from mufem import Bnd, Vol, Simulation, SteadyRunner
 from mufem.electromagnetics.timeharmonicmaxwell import (
@@ -11,6 +14,30 @@ from mufem.electromagnetics.timeharmonicmaxwell import (
     WaveguideOutputPortCondition,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.checkpoint import SweepCheckpoint  # noqa: E402
+from common.results import ResultsWriter  # noqa: E402
+from common.sweeps import (  # noqa: E402
+    adaptive_frequency_sweep,
+    farm_frequency_sweep,
+    frequency_sweep,
+)
+
+# With --fast_sweep only a few frequencies are solved and S21 is interpolated in
+# between by an adaptive rational model, accurate to --fast_sweep_tolerance.
+# With --workers N the frequencies are split across N processes started with
+# --worker_launcher, e.g. "mpirun -np 4 pymufem" for 4 ranks per worker.
+# With --resume a full sweep which was stopped continues with the frequencies
+# not yet recorded in its checkpoint.
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument("--fast_sweep", action="store_true")
+parser.add_argument("--fast_sweep_tolerance", type=float, default=1e-3)
+parser.add_argument("--workers", type=int, default=1)
+parser.add_argument("--worker_launcher", type=str, default="pymufem")
+parser.add_argument("--resume", action="store_true")
+args, _ = parser.parse_known_args()
+
 # **************************************************************************************
 # Problem setup
 # **************************************************************************************
@@ -89,20 +116,59 @@ frequencies_paraview = [12e9, 14e9]  # [Hz] frequencies at which to save the fie
 vis = sim.get_field_exporter()
 vis.add_field_output("Electric Field-Real")
 
-S21 = numpy.zeros(Nf, dtype=complex)
-
-for i, frequency in enumerate(frequencies):
-    if is_main_process:
-        print(f"\nFrequency {i+1} of {Nf}...")
 
+def solve(frequency):
     model.set_frequency(frequency)
     runner.advance(1)
 
-    if frequency in frequencies_paraview:
+    if numpy.isclose(frequency, frequencies_paraview).any():
         vis.save(order=2)
 
-    report_data = report_s_parameters.evaluate().to_numpy()
-    S21[i] = report_data[0, 0]
+    return report_s_parameters.evaluate().to_numpy()
+
+
+if args.fast_sweep:
+    S = adaptive_frequency_sweep(
+        solve=solve,
+        frequencies=frequencies,
+        tolerance=args.fast_sweep_tolerance,
+        include=frequencies_paraview,
+        verbose=is_main_process,
+    )
+elif args.workers > 1:
+    S = farm_frequency_sweep(
+        solve=solve,
+        frequencies=frequencies,
+        workers=args.workers,
+        include=frequencies_paraview,
+        launcher=args.worker_launcher,
+        is_main_process=is_main_process,
+        verbose=is_main_process,
+    )
+else:
+    checkpoint = SweepCheckpoint(
+        path="results/S21_vs_frequency.checkpoint.json",
+        resume=args.resume,
+        enabled=is_main_process,
+    )
+
+    S = frequency_sweep(
+        solve=solve,
+        frequencies=frequencies,
+        verbose=is_main_process,
+        checkpoint=checkpoint,
+    )
+
+S21 = S[:, 0, 0]
+
+with ResultsWriter(
+    path="results/S21_vs_frequency.csv",
+    columns=("frequency", "S21_real", "S21_imag"),
+    header="frequency [Hz], Re(S21), Im(S21)",
+    enabled=is_main_process,
+) as results:
+    for frequency, s21 in zip(frequencies, S21):
+        results.write(frequency, s21.real, s21.imag)
 
 
 # **************************************************************************************
@@ -1,7 +1,14 @@
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 
-data = np.loadtxt("results/Capacitance.csv", delimiter=",")
+# The results of case.py, or the results of all jobs merged by sweep.py; the rows of
+# every shift are in the order of the refinement steps.
+parser = argparse.ArgumentParser()
+parser.add_argument("--input", type=str, default="results/Capacitance.csv")
+args = parser.parse_args()
+
+data = np.loadtxt(args.input, delimiter=",")
 
 xshifts = np.unique(data[:, 0])
 
@@ -1,4 +1,6 @@
-import gmsh
+import argparse
+import sys
+from pathlib import Path
 
 from mufem import (
     Bnd,
@@ -15,85 +17,27 @@ from mufem.electromagnetics.electrostatics import (
     ElectrostaticsModel,
 )
 
+dir_path = Path(__file__).resolve().parent
 
-def create_geometry(xshift, mesh_file="geometry.msh"):
-    gmsh.initialize()
+sys.path.append(str(dir_path))
+sys.path.append(str(dir_path.parents[1]))
 
-    # Create geometry ------------------------------------------------------------------
-    u = 1  # unit of spatial dimensions
+from common.checkpoint import SweepCheckpoint  # noqa: E402
+from common.results import ResultsWriter  # noqa: E402
+from geometry import MeshCache  # noqa: E402
 
-    def tooth(x, y, z):
-        return gmsh.model.occ.addBox(x, y, z, 15 * u, 4 * u, 4 * u)
-
-    # Comb 1:
-    tag_tooth1 = tooth(0, 0, 0)
-    tag_tooth2 = tooth(0, 0, 10 * u)
-    tag_tooth3 = tooth(0, 0, 20 * u)
-    tag_tooth4 = tooth(0, 0, 30 * u)
-    tag_base = gmsh.model.occ.addBox(0, 0, 0, 5 * u, 4 * u, 34 * u)
-
-    ov = gmsh.model.occ.fuse(
-        [(3, tag_base)],
-        [(3, tag_tooth1), (3, tag_tooth2), (3, tag_tooth3), (3, tag_tooth4)],
-    )
-    comb1 = ov[0][0]
-
-    gmsh.model.occ.translate([comb1], -xshift / 2, 0, 0)
-
-    # Comb 2:
-    tag_tooth1 = tooth(7 * u, 0, 5 * u)
-    tag_tooth1 = tooth(7 * u, 0, 5 * u + 10 * u)
-    tag_tooth1 = tooth(7 * u, 0, 5 * u + 20 * u)
-    tag_base = gmsh.model.occ.addBox(17 * u, 0, 0, 5 * u, 4 * u, 34 * u)
-
-    ov = gmsh.model.occ.fuse(
-        [(3, tag_base)], [(3, tag_tooth1), (3, tag_tooth2), (3, tag_tooth3)]
-    )
-    comb2 = ov[0][0]
-
-    gmsh.model.occ.translate([comb2], +xshift / 2, 0, 0)
-
-    # Domain box:
-    wx = 88 * u
-    wy = 44 * u
-    wz = 88 * u
-    tag_domain = gmsh.model.occ.addBox(
-        11 * u - wx / 2, -6 * u, 17 * u - wz / 2, wx, wy, wz
-    )
-
-    ov = gmsh.model.occ.cut([(3, tag_domain)], [comb1, comb2])
-    domain = ov[0][0]
-
-    gmsh.model.occ.synchronize()
-
-    # Assign attributes ----------------------------------------------------------------
-    print("3D: ", gmsh.model.getEntities(3))
-    print("2D: ", gmsh.model.getEntities(2))
-
-    comb1 = [(2, i) for i in range(1, 19)]
-    comb2 = [(2, i) for i in range(19, 37)]
-    ground = [(2, 38)]
-    domain = [(3, 3)]
-
-    gmsh.model.addPhysicalGroup(2, [dimTag[1] for dimTag in comb1], name="Comb1", tag=1)
-    gmsh.model.addPhysicalGroup(2, [dimTag[1] for dimTag in comb2], name="Comb2", tag=2)
-    gmsh.model.addPhysicalGroup(
-        2, [dimTag[1] for dimTag in ground], name="Ground", tag=3
-    )
-    gmsh.model.addPhysicalGroup(
-        3, [dimTag[1] for dimTag in domain], name="Domain", tag=1
-    )
-
-    # Generate mesh --------------------------------------------------------------------
-    maxh = 4 * u
-    gmsh.option.setNumber("Mesh.MeshSizeMax", maxh)
-
-    gmsh.model.mesh.generate(3)
-
-    gmsh.option.setNumber("Mesh.MshFileVersion", 2.2)
-    gmsh.write(mesh_file)
-
-    gmsh.finalize()
+# With --resume a sweep which was stopped continues after the last completed shift.
+# With --morph_mesh the meshes of the shifts are morphed from each other instead of
+# being generated one by one.
+# --xshifts, --output and --no_field_output let sweep.py run subsets of the shifts
+# as separate jobs.
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument("--resume", action="store_true")
+parser.add_argument("--morph_mesh", action="store_true")
+parser.add_argument("--xshifts", type=float, nargs="+")
+parser.add_argument("--output", type=str, default="results/Capacitance.csv")
+parser.add_argument("--no_field_output", action="store_true")
+args, _ = parser.parse_known_args()
 
 
 sim = Simulation.New(name="Ren_2014_MEMS_Comb_Drive")
@@ -105,10 +49,18 @@ sim.set_runner(runner)
 # Mesh ---------------------------------------------------------------------------------
 xshifts = [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, 6, 6.5, 7, 7.5, 8]
 
+if args.xshifts is not None:
+    xshifts = args.xshifts
+
+# The meshes of all shifts are generated once and reused by later runs.
+mesh_cache = MeshCache(
+    directory=f"{dir_path}/mesh_cache", maxh=4, morph=args.morph_mesh
+)
+
 if sim.get_machine().is_main_process():
-    create_geometry(xshifts[0])
+    mesh_cache.get(xshifts[0])
 
-sim.get_domain().load_mesh("geometry.msh")
+sim.get_domain().load_mesh(mesh_cache.path(xshifts[0]))
 sim.get_domain().get_mesh().scale(1e-6)
 
 refinement_model = RefinementModel()
@@ -161,32 +113,48 @@ max_iterations = 10  # maximum number of iterations for each mesh file
 
 max_ncells = 1e5  # maximum number of cells
 
-with open("results/Capacitance.csv", "w") as fp:
-    fp.write("# xshift [um], ncells, capacitance [F]\n")
+checkpoint = SweepCheckpoint(
+    path=str(Path(args.output).with_suffix(".checkpoint.json")),
+    resume=args.resume,
+    enabled=sim.get_machine().is_main_process(),
+)
+
+results = ResultsWriter(
+    path=args.output,
+    columns=("xshift", "ncells", "capacitance"),
+    header="xshift [um], ncells, capacitance [F]",
+    resume=args.resume,
+    keep_rows=checkpoint.rows,
+    enabled=sim.get_machine().is_main_process(),
+)
 
 vis = sim.get_field_exporter()
 vis.add_field_output("Electric Potential")
 
-for xshift in xshifts:
+pending_xshifts = [xshift for xshift in xshifts if xshift not in checkpoint]
+
+for n, xshift in enumerate(pending_xshifts):
     if sim.get_machine().is_main_process():
-        create_geometry(xshift)
+        mesh_cache.get(xshift)
 
-    sim.get_domain().load_mesh("geometry.msh")
+        # Generate the mesh of the next shift while this one is solved.
+        if n + 1 < len(pending_xshifts):
+            mesh_cache.prefetch(pending_xshifts[n + 1])
+
+    sim.get_domain().load_mesh(mesh_cache.path(xshift))
     sim.get_domain().get_mesh().scale(1e-6)
 
     for i in range(max_iterations):
         runner.advance(2)
 
-        if i == 0:
+        if i == 0 and not args.no_field_output:
             vis.save(order=2)
 
         ncells = sim.get_domain().get_mesh().get_total_number_cells()
         energy = report.evaluate()
         capacitance = 2 * energy / voltage**2  # [F]
 
-        if sim.get_machine().is_main_process():
-            with open("results/Capacitance.csv", "a") as fp:
-                fp.write(f"{xshift:.1f}, {ncells}, {capacitance}\n")
+        results.write(xshift, ncells, capacitance)
 
         if ncells >= max_ncells:
             break
@@ -198,4 +166,9 @@ for xshift in xshifts:
             "Maximum number of iterations reached without reaching max_ncells."
         )
 
-    vis.save(order=2)
+    if not args.no_field_output:
+        vis.save(order=2)
+
+    checkpoint.complete(key=xshift, results=results)
+
+results.close()
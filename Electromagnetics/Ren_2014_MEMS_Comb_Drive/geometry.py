@@ -0,0 +1,323 @@
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import gmsh
+import numpy
+
+
+def create_geometry(xshift, mesh_file="geometry.msh", maxh=4, binary=False):
+    gmsh.initialize()
+
+    # Create geometry ------------------------------------------------------------------
+    u = 1  # unit of spatial dimensions
+
+    def tooth(x, y, z):
+        return gmsh.model.occ.addBox(x, y, z, 15 * u, 4 * u, 4 * u)
+
+    # Comb 1:
+    tag_tooth1 = tooth(0, 0, 0)
+    tag_tooth2 = tooth(0, 0, 10 * u)
+    tag_tooth3 = tooth(0, 0, 20 * u)
+    tag_tooth4 = tooth(0, 0, 30 * u)
+    tag_base = gmsh.model.occ.addBox(0, 0, 0, 5 * u, 4 * u, 34 * u)
+
+    ov = gmsh.model.occ.fuse(
+        [(3, tag_base)],
+        [(3, tag_tooth1), (3, tag_tooth2), (3, tag_tooth3), (3, tag_tooth4)],
+    )
+    comb1 = ov[0][0]
+
+    gmsh.model.occ.translate([comb1], -xshift / 2, 0, 0)
+
+    # Comb 2:
+    tag_tooth1 = tooth(7 * u, 0, 5 * u)
+    tag_tooth1 = tooth(7 * u, 0, 5 * u + 10 * u)
+    tag_tooth1 = tooth(7 * u, 0, 5 * u + 20 * u)
+    tag_base = gmsh.model.occ.addBox(17 * u, 0, 0, 5 * u, 4 * u, 34 * u)
+
+    ov = gmsh.model.occ.fuse(
+        [(3, tag_base)], [(3, tag_tooth1), (3, tag_tooth2), (3, tag_tooth3)]
+    )
+    comb2 = ov[0][0]
+
+    gmsh.model.occ.translate([comb2], +xshift / 2, 0, 0)
+
+    # Domain box:
+    wx = 88 * u
+    wy = 44 * u
+    wz = 88 * u
+    tag_domain = gmsh.model.occ.addBox(
+        11 * u - wx / 2, -6 * u, 17 * u - wz / 2, wx, wy, wz
+    )
+
+    ov = gmsh.model.occ.cut([(3, tag_domain)], [comb1, comb2])
+    domain = ov[0][0]
+
+    gmsh.model.occ.synchronize()
+
+    # Assign attributes ----------------------------------------------------------------
+    print("3D: ", gmsh.model.getEntities(3))
+    print("2D: ", gmsh.model.getEntities(2))
+
+    comb1 = [(2, i) for i in range(1, 19)]
+    comb2 = [(2, i) for i in range(19, 37)]
+    ground = [(2, 38)]
+    domain = [(3, 3)]
+
+    gmsh.model.addPhysicalGroup(2, [dimTag[1] for dimTag in comb1], name="Comb1", tag=1)
+    gmsh.model.addPhysicalGroup(2, [dimTag[1] for dimTag in comb2], name="Comb2", tag=2)
+    gmsh.model.addPhysicalGroup(
+        2, [dimTag[1] for dimTag in ground], name="Ground", tag=3
+    )
+    gmsh.model.addPhysicalGroup(
+        3, [dimTag[1] for dimTag in domain], name="Domain", tag=1
+    )
+
+    # Generate mesh --------------------------------------------------------------------
+    gmsh.option.setNumber("Mesh.MeshSizeMax", maxh * u)
+
+    gmsh.model.mesh.generate(3)
+
+    gmsh.option.setNumber("Mesh.MshFileVersion", 2.2)
+    gmsh.option.setNumber("Mesh.Binary", int(binary))
+
+    # Write to a temporary file first, so that a mesh file is always complete.
+    root, extension = os.path.splitext(mesh_file)
+    gmsh.write(f"{root}.tmp{extension}")
+    os.replace(f"{root}.tmp{extension}", mesh_file)
+
+    gmsh.finalize()
+
+
+def _distance(points, targets, chunk=2048):
+
+    # Distance from every point to the closest target, in chunks to bound memory.
+    distance = numpy.empty(len(points))
+
+    for i in range(0, len(points), chunk):
+        block = slice(i, i + chunk)
+        difference = points[block, None, :] - targets[None, :, :]
+        distance[block] = numpy.sqrt((difference**2).sum(axis=-1).min(axis=1))
+
+    return distance
+
+
+def morph_mesh(base_mesh_file, base_xshift, xshift, mesh_file, min_quality=0.1):
+    """Moves the nodes of the mesh generated for `base_xshift` to the geometry of
+    `xshift`, keeping the elements, and writes the result to `mesh_file`.
+
+    The nodes on the comb surfaces are moved rigidly with their comb, the nodes on
+    the domain box stay, and the nodes in between are moved by an inverse distance
+    weighted blend of both. Returns False without writing the mesh if the minimum
+    element quality (minimal scaled Jacobian) drops below `min_quality`, in which
+    case the mesh has to be generated again.
+    """
+
+    gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+    gmsh.open(base_mesh_file)
+
+    tags, coordinates, _ = gmsh.model.mesh.getNodes()
+    coordinates = coordinates.reshape(-1, 3)
+
+    index = numpy.zeros(tags.max() + 1, dtype=int)
+    index[tags] = numpy.arange(len(tags))
+
+    def group_nodes(name):
+        for dim, tag in gmsh.model.getPhysicalGroups(dim=2):
+            if gmsh.model.getPhysicalName(dim, tag) == name:
+                return index[gmsh.model.mesh.getNodesForPhysicalGroup(dim, tag)[0]]
+
+    comb1 = group_nodes("Comb1")
+    comb2 = group_nodes("Comb2")
+
+    # The distance to the closest face of the domain box.
+    lower = coordinates.min(axis=0)
+    upper = coordinates.max(axis=0)
+    distance_box = numpy.minimum(coordinates - lower, upper - coordinates).min(axis=1)
+
+    shift = (xshift - base_xshift) / 2
+
+    displacement = numpy.zeros(len(tags))
+    displacement[comb1] = -shift
+    displacement[comb2] = +shift
+
+    free = numpy.ones(len(tags), dtype=bool)
+    free[comb1] = False
+    free[comb2] = False
+    free[numpy.isclose(distance_box, 0.0)] = False
+
+    weight_box = 1.0 / distance_box[free] ** 2
+    weight_comb1 = 1.0 / _distance(coordinates[free], coordinates[comb1]) ** 2
+    weight_comb2 = 1.0 / _distance(coordinates[free], coordinates[comb2]) ** 2
+
+    displacement[free] = (shift * (weight_comb2 - weight_comb1)) / (
+        weight_box + weight_comb1 + weight_comb2
+    )
+
+    coordinates[:, 0] += displacement
+
+    for tag, coordinate in zip(tags, coordinates):
+        gmsh.model.mesh.setNode(tag, coordinate, [])
+
+    element_tags, _ = gmsh.model.mesh.getElementsByType(4)
+    quality = gmsh.model.mesh.getElementQualities(element_tags, "minSJ")
+
+    morphed = quality.min() >= min_quality
+
+    if morphed:
+        gmsh.option.setNumber("Mesh.MshFileVersion", 2.2)
+        gmsh.option.setNumber("Mesh.Binary", 1)
+
+        root, extension = os.path.splitext(mesh_file)
+        gmsh.write(f"{root}.tmp{extension}")
+        os.replace(f"{root}.tmp{extension}", mesh_file)
+
+    gmsh.finalize()
+
+    return morphed
+
+
+class MeshCache:
+    """Binary meshes of the comb drive for given shifts, generated once and kept in
+    `directory` across runs.
+
+    The cache is keyed on the shift, the maximum element size and the contents of
+    this file, so changing the geometry invalidates old meshes. `prefetch` starts
+    generating a mesh in a separate process, so that it can overlap with the solve
+    of the previous shift, `get` waits for it (or generates the mesh right away).
+
+    With `morph=True` the meshes are not generated for every shift, but morphed
+    from the mesh of an earlier shift with `morph_mesh`, so that consecutive
+    shifts share the same elements. Only if the morphed elements become too
+    distorted a new mesh is generated, which is the base of the following shifts.
+    The morphed meshes are cached under the shift they were morphed from, and the
+    mesh chosen for a shift in the current run is copied to `path(xshift)`, so
+    that meshes morphed from different bases, e.g. by earlier runs with other
+    shifts, are never mixed.
+    """
+
+    def __init__(self, directory, maxh=4, morph=False):
+
+        self.directory = Path(directory)
+        self.maxh = maxh
+        self.morph = morph
+
+        self._base_xshift = None
+        self._processes = {}
+        self._digest = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+    def _generated_path(self, xshift) -> str:
+        return str(
+            self.directory
+            / f"comb_xshift{xshift:g}_maxh{self.maxh:g}_{self._digest}.msh"
+        )
+
+    def _morphed_path(self, xshift, base_xshift) -> str:
+        return str(
+            self.directory
+            / f"comb_xshift{xshift:g}_maxh{self.maxh:g}_morphed_from{base_xshift:g}_"
+            f"{self._digest}.msh"
+        )
+
+    def path(self, xshift) -> str:
+
+        if self.morph:
+            return str(
+                self.directory
+                / f"comb_xshift{xshift:g}_maxh{self.maxh:g}_morphed_{self._digest}.msh"
+            )
+
+        return self._generated_path(xshift)
+
+    def prefetch(self, xshift):
+
+        # Morphing is cheap, only meshes which are generated are worth prefetching.
+        if self.morph:
+            return
+
+        if os.path.exists(self.path(xshift)) or xshift in self._processes:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._processes[xshift] = subprocess.Popen(
+            args=[
+                sys.executable,
+                __file__,
+                f"--xshift={xshift}",
+                f"--maxh={self.maxh}",
+                f"--mesh_file={self.path(xshift)}",
+                "--binary",
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+
+    def _generate(self, xshift) -> str:
+
+        process = self._processes.pop(xshift, None)
+
+        if process is not None and process.wait() != 0:
+            raise RuntimeError(f"Mesh generation for xshift = {xshift} failed.")
+
+        if not os.path.exists(self._generated_path(xshift)):
+            self.directory.mkdir(parents=True, exist_ok=True)
+            create_geometry(
+                xshift=xshift,
+                mesh_file=self._generated_path(xshift),
+                maxh=self.maxh,
+                binary=True,
+            )
+
+        return self._generated_path(xshift)
+
+    def get(self, xshift) -> str:
+
+        if not self.morph:
+            return self._generate(xshift)
+
+        # Choose the base first, the cached morphed meshes depend on it.
+        if self._base_xshift is None:
+            self._base_xshift = xshift
+
+        mesh_file = self._morphed_path(xshift, self._base_xshift)
+
+        if xshift == self._base_xshift:
+            mesh_file = self._generate(xshift)
+
+        elif not os.path.exists(mesh_file) and not morph_mesh(
+            base_mesh_file=self._generate(self._base_xshift),
+            base_xshift=self._base_xshift,
+            xshift=xshift,
+            mesh_file=mesh_file,
+        ):
+            # The morphed mesh is too distorted: start from a new one.
+            self._base_xshift = xshift
+            mesh_file = self._generate(xshift)
+
+        root, extension = os.path.splitext(self.path(xshift))
+        shutil.copyfile(mesh_file, f"{root}.tmp{extension}")
+        os.replace(f"{root}.tmp{extension}", self.path(xshift))
+
+        return self.path(xshift)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--xshift", type=float, default=0.0)
+    parser.add_argument("--maxh", type=float, default=4)
+    parser.add_argument("--mesh_file", type=str, default="geometry.msh")
+    parser.add_argument("--binary", action="store_true")
+    args = parser.parse_args()
+
+    create_geometry(
+        xshift=args.xshift,
+        mesh_file=args.mesh_file,
+        maxh=args.maxh,
+        binary=args.binary,
+    )
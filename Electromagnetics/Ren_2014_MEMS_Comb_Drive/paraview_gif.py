@@ -1,9 +1,23 @@
 import paraview.simple as pvs
 
-import subprocess
+import argparse
+import os
+import sys
+from pathlib import Path
 
+from PIL import Image
+
+dir_path = Path(__file__).resolve().parent
+
+sys.path.append(str(dir_path.parents[1]))
+
+from common.animation import encode_animation, render_frames  # noqa: E402
+
+
+def load_data(data_file):
+    """Builds the view, the filters and the color map once, the frames then only
+    swap the file read, see `visualize_and_save`."""
 
-def create_scene(data_file, screenshot_file, show=False):
     field_name = "Electric Potential"
     field_unit = "V"
 
@@ -27,10 +41,10 @@ def create_scene(data_file, screenshot_file, show=False):
     view.CameraParallelScale = 5e-5
     view.CenterOfRotation = [0.0, 0.0, 0.0]
 
-    data = pvs.OpenDataFile(data_file)
+    reader = pvs.OpenDataFile(data_file)
 
     # Clip settings:
-    data = pvs.Clip(Input=data)
+    data = pvs.Clip(Input=reader)
     data.ClipType = "Plane"
     data.ClipType.Origin = [11e-6, 2e-6, 17e-6]
     data.ClipType.Normal = [0, 1, 0]
@@ -49,6 +63,9 @@ def create_scene(data_file, screenshot_file, show=False):
     ctf = pvs.GetColorTransferFunction(field_name)
     ctf.ApplyPreset("Cool to Warm")
 
+    # Keep the range fixed when the data of the next frame is read.
+    ctf.AutomaticRescaleRangeMode = "Never"
+
     # Scalar bar settings:
     scalar_bar = pvs.GetScalarBar(ctf)
     scalar_bar.Orientation = "Horizontal"
@@ -64,47 +81,76 @@ def create_scene(data_file, screenshot_file, show=False):
     scalar_bar.LabelFormat = "%.0f"
     scalar_bar.LookupTable.RescaleTransferFunction([0, 1])
 
-    pvs.Render()
+    return {"view": view, "reader": reader}
+
+
+def visualize_and_save(state, data_file, screenshot_file, show=False):
+
+    view = state["view"]
+    reader = state["reader"]
+
+    reader.FileName = data_file
 
-    pvs.SaveScreenshot(screenshot_file)
+    pvs.UpdatePipeline(proxy=reader)
+    pvs.Render(view)
+
+    pvs.SaveScreenshot(screenshot_file, view)
 
     if show:
         pvs.Interact()
 
-    pvs.Delete(view)
-    pvs.Delete(data)
-    pvs.Delete(display)
 
+def data_file(i):
+    return f"VisualizationOutput/Output_{2*i+1}.vtpc"
+
+
+def screenshot_file(i):
+    return f"vis/Electric_Potential_{i:03d}.png"
+
+
+# The pipeline of a rendering process, see `initialize_worker`.
+worker = {}
 
-if __name__ == "__main__":
-    # Create the scene images with a siple name pattern:
-    for i in range(17):
-        data_file = f"VisualizationOutput/Output_{2*i+1}.vtpc"
-        screenshot_file = f"results/{i}.png"
 
-        create_scene(data_file, screenshot_file)
+def initialize_worker():
+    worker["state"] = load_data(data_file(0))
+
+
+def render_scene(i):
+    visualize_and_save(worker["state"], data_file(i), screenshot_file(i))
+
+
+if __name__ == "__main__":
 
-    # 1) Use ffmpeg to convert the images to mp4 movie:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--force", action="store_true", help="Render all frames, not only new ones."
+    )
+    args = parser.parse_args()
+
+    os.makedirs("vis", exist_ok=True)
+
+    # Create the scene images with a simple name pattern, skipping the ones which
+    # are newer than their data. Every worker builds the pipeline once and only
+    # reads the data of its frames:
+    render_frames(
+        render=render_scene,
+        frames=range(17),
+        workers=args.workers,
+        initializer=initialize_worker,
+        outputs=lambda i: [screenshot_file(i)],
+        inputs=lambda i: [data_file(i)],
+        force=args.force,
+    )
+
+    # Stream the images to ffmpeg, which converts them to a gif:
     #    - use the 'reverse' option to reverse the video in order to show the attractive
     #      force
-    # 2) Use ffmpeg to convert mp4 movie to gif:
-    #    - creating mp4 first and then converting to gif results in better gif quality
-    # 3) Remove unnecessary files
-    commands = [
-        (
-            "ffmpeg -framerate 5 -i results/%d.png "
-            "-vf reverse -c:v libx264 -pix_fmt yuv420p results/output.mp4"
-        ),
-        (
-            "ffmpeg -i results/output.mp4 "
-            "-vf 'fps=5,scale=800:-1:flags=lanczos' "
-            "-c:v gif results/Electric_Potential.gif -y"
-        ),
-        "rm results/output.mp4",
-        "bash -c 'rm results/{0..16}.png'",
-    ]
-    for command in commands:
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
-
-        if result.returncode != 0:
-            print(result.stderr)
+    encode_animation(
+        images=(Image.open(screenshot_file(i)) for i in range(17)),
+        output_path="results/Electric_Potential.gif",
+        framerate=5,
+        width=800,
+        filters=["reverse"],
+    )
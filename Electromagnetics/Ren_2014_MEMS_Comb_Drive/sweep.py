@@ -0,0 +1,108 @@
+import argparse
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy
+
+dir_path = Path(__file__).resolve().parent
+
+sys.path.append(str(dir_path.parents[1]))
+
+from common.results import ResultsWriter  # noqa: E402
+
+# Runs the shifts of case.py as several jobs at the same time, each on its own
+# group of --ranks MPI ranks, and merges their results into results/Capacitance.csv.
+parser = argparse.ArgumentParser()
+parser.add_argument("--jobs", type=int, default=4)
+parser.add_argument("--ranks", type=int, default=1)
+parser.add_argument("--launcher", type=str, default="pymufem")
+parser.add_argument("--mpi_launcher", type=str, default="mpirun -np {ranks}")
+parser.add_argument(
+    "--xshifts",
+    type=float,
+    nargs="+",
+    default=[0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, 6, 6.5, 7, 7.5, 8],
+)
+parser.add_argument("--resume", action="store_true")
+parser.add_argument("--morph_mesh", action="store_true")
+args = parser.parse_args()
+
+output_path = dir_path / "results" / "sweep"
+output_path.mkdir(parents=True, exist_ok=True)
+
+if args.morph_mesh:
+    # Every job gets a contiguous block of shifts, so that it morphs its meshes
+    # across the same small steps as a single run.
+    jobs = [
+        [float(xshift) for xshift in block]
+        for block in numpy.array_split(args.xshifts, args.jobs)
+    ]
+else:
+    # Every job gets every --jobs-th shift, so that small and large shifts are mixed.
+    jobs = [
+        [args.xshifts[i] for i in range(k, len(args.xshifts), args.jobs)]
+        for k in range(args.jobs)
+    ]
+
+jobs = [xshifts for xshifts in jobs if xshifts]
+
+launcher = shlex.split(args.launcher)
+
+if args.ranks > 1:
+    launcher = shlex.split(args.mpi_launcher.format(ranks=args.ranks)) + launcher
+
+processes = []
+logs = []
+
+for k, xshifts in enumerate(jobs):
+    command = launcher + [
+        str(dir_path / "case.py"),
+        "--xshifts",
+        *[f"{xshift:g}" for xshift in xshifts],
+        f"--output={output_path / f'Capacitance_{k}.csv'}",
+        "--no_field_output",
+    ]
+
+    if args.resume:
+        command.append("--resume")
+
+    if args.morph_mesh:
+        command.append("--morph_mesh")
+
+    print(f"Job {k}: xshift = {', '.join(f'{xshift:g}' for xshift in xshifts)}")
+
+    logs.append(open(output_path / f"job_{k}.log", "w"))
+
+    processes.append(
+        subprocess.Popen(
+            args=command, cwd=dir_path, stdout=logs[-1], stderr=subprocess.STDOUT
+        )
+    )
+
+failed = [k for k, process in enumerate(processes) if process.wait() != 0]
+
+for log in logs:
+    log.close()
+
+if failed:
+    sys.exit(f"Jobs {failed} failed, see the logs in {output_path}.")
+
+# Merge the rows of all jobs, sorted by shift but keeping the order of the
+# refinement steps of every shift.
+rows = numpy.concatenate(
+    [
+        numpy.loadtxt(output_path / f"Capacitance_{k}.csv", delimiter=",", ndmin=2)
+        for k in range(len(jobs))
+    ]
+)
+rows = rows[numpy.argsort(rows[:, 0], kind="stable")]
+
+with ResultsWriter(
+    path=dir_path / "results" / "Capacitance.csv",
+    columns=("xshift", "ncells", "capacitance"),
+    header="xshift [um], ncells, capacitance [F]",
+) as results:
+    for xshift, ncells, capacitance in rows:
+        results.write(xshift, int(ncells), capacitance)
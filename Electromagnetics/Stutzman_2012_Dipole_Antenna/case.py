@@ -1,3 +1,6 @@
+import sys
+from pathlib import Path
+
 import numpy as np
 
 import mufem
@@ -11,6 +14,10 @@ from mufem.electromagnetics.timeharmonicmaxwell import (
     TimeHarmonicMaxwellModel,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.far_field import evaluate_far_field  # noqa: E402
+
 # **************************************************************************************
 # Problem setup
 # **************************************************************************************
@@ -109,3 +116,37 @@ np.savez(
     phis=phis,
     radiation_pattern=radiation_pattern,
 )
+
+
+# **************************************************************************************
+# Export E-plane and H-plane cuts of the far-field radiation pattern
+# **************************************************************************************
+# The cuts are evaluated at a finer resolution than the 3D pattern above, each as a
+# degenerate grid of a single sensor, instead of computing a dense sphere.
+if sim.get_machine().is_main_process():
+    print("\nExport far-field radiation pattern cuts...")
+
+cut_step = 1.0  # [deg]
+cut_thetas = np.arange(0.0, 180.0 + cut_step / 2, cut_step)
+cut_phis = np.arange(0.0, 360.0 + cut_step / 2, cut_step)
+
+# E-plane: the plane of the dipole, i.e. the azimuthal angles 0 and 180 deg
+eplane = evaluate_far_field(
+    np.column_stack((np.tile(cut_thetas, 2), np.repeat([0.0, 180.0], len(cut_thetas))))
+).reshape(2, len(cut_thetas))
+
+np.savez(
+    "results/Far_Field_E-plane.npz",
+    thetas=np.radians(cut_thetas),
+    radiation_pattern_phi0=eplane[0],
+    radiation_pattern_phi180=eplane[1],
+)
+
+# H-plane: the plane perpendicular to the dipole, i.e. the polar angle 90 deg
+hplane = evaluate_far_field(np.column_stack((np.full(len(cut_phis), 90.0), cut_phis)))
+
+np.savez(
+    "results/Far_Field_H-plane.npz",
+    phis=np.radians(cut_phis),
+    radiation_pattern=hplane,
+)
@@ -1,7 +1,8 @@
 import numpy as np
 import paraview.simple as pvs
-from vtkmodules.vtkCommonCore import vtkPoints, vtkDoubleArray
-from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkCellArray, vtkQuad
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkCellArray
 
 # **************************************************************************************
 # Load data
@@ -25,44 +26,43 @@ scale = 4.5
 
 poly = vtkPolyData()
 
-points = vtkPoints()
-field_array = vtkDoubleArray()
-field_array.SetName(field_name)
-field_array.SetNumberOfComponents(1)
-field_array.SetNumberOfTuples(Nth * Nph)
+# The point of theta j and phi i has the index j * Nph + i. The arrays are handed to
+# VTK without copying them (deep=False), VTK keeps a reference to them.
+theta, phi = np.meshgrid(thetas, phis, indexing="ij")
 
-idx = 0
-for j, theta in enumerate(thetas):
-    for i, phi in enumerate(phis):
-        v = float(radiation_pattern[j, i])
-        r = base_radius + scale * v
+values = np.ascontiguousarray(radiation_pattern, dtype=float).reshape(Nth * Nph)
+r = base_radius + scale * values
 
-        x = r * np.sin(theta) * np.cos(phi)
-        y = r * np.sin(theta) * np.sin(phi)
-        z = r * np.cos(theta)
+xyz = np.column_stack(
+    (
+        r * (np.sin(theta) * np.cos(phi)).ravel(),
+        r * (np.sin(theta) * np.sin(phi)).ravel(),
+        r * np.cos(theta).ravel(),
+    )
+)
 
-        points.InsertNextPoint(float(x), float(y), float(z))
-        field_array.SetValue(idx, v)
-        idx += 1
+points = vtkPoints()
+points.SetData(numpy_support.numpy_to_vtk(xyz, deep=False))
+
+field_array = numpy_support.numpy_to_vtk(values, deep=False)
+field_array.SetName(field_name)
 
 poly.SetPoints(points)
 poly.GetPointData().AddArray(field_array)
 poly.GetPointData().SetScalars(field_array)
 
+# One quad per pair of neighbouring thetas and phis, starting at its first corner:
+p0 = (np.arange(Nth - 1)[:, None] * Nph + np.arange(Nph - 1)).ravel()
+
+connectivity = np.column_stack((p0, p0 + 1, p0 + 1 + Nph, p0 + Nph))
+connectivity = connectivity.astype(numpy_support.ID_TYPE_CODE).ravel()
+offsets = np.arange(0, len(connectivity) + 1, 4, dtype=numpy_support.ID_TYPE_CODE)
+
 cells = vtkCellArray()
-for j in range(Nth - 1):
-    for i in range(Nph - 1):
-        p0 = j * Nph + i
-        p1 = p0 + 1
-        p2 = p0 + 1 + Nph
-        p3 = p0 + Nph
-
-        quad = vtkQuad()
-        quad.GetPointIds().SetId(0, p0)
-        quad.GetPointIds().SetId(1, p1)
-        quad.GetPointIds().SetId(2, p2)
-        quad.GetPointIds().SetId(3, p3)
-        cells.InsertNextCell(quad)
+cells.SetData(
+    numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=False),
+    numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=False),
+)
 
 poly.SetPolys(cells)
 
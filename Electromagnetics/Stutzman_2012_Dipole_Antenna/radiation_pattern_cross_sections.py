@@ -12,23 +12,22 @@ def to_db(value):
 
 
 # mufem results ------------------------------------------------------------------------
-data = np.load("results/Far_Field_3D.npz")
+# E-plane (ϕ=0 and ϕ=180 deg, the latter is drawn from θ=π to 2π):
+data = np.load("results/Far_Field_E-plane.npz")
 
 thetas = data["thetas"]
-phis = data["phis"]
-radiation_pattern = data["radiation_pattern"]
-
 thetas_full = np.concatenate((thetas, thetas + np.pi))
 
-# E-plane:
-iph = np.argmin(np.abs(phis - 0.0))
-eplane = radiation_pattern[:, iph]
-eplane = eplane / np.max(eplane)
-eplane_full = np.concatenate((eplane, eplane[::-1]))
+eplane_full = np.concatenate(
+    (data["radiation_pattern_phi0"], data["radiation_pattern_phi180"][::-1])
+)
+eplane_full = eplane_full / np.max(eplane_full)
 
-# H-plane:
-ith = np.argmin(np.abs(thetas - np.pi / 2))
-hplane = radiation_pattern[ith, :]
+# H-plane (θ=90 deg):
+data = np.load("results/Far_Field_H-plane.npz")
+
+phis = data["phis"]
+hplane = data["radiation_pattern"]
 hplane = hplane / np.max(hplane)
 
 
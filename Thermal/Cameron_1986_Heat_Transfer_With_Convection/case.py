@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt
-import numpy
+import sys
+from pathlib import Path
 
 import mufem
 from mufem import Bnd, Vol
@@ -11,6 +12,10 @@ from mufem.thermal import (
     TemperatureCondition,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.probes import LineProbe  # noqa: E402
+
 # Problem setup ------------------------------------------------------------------------
 sim = mufem.Simulation.New(
     name="Cameron 1986: Heat Transfer With Convection",
@@ -79,18 +84,10 @@ if is_main_process:
     print()
 
 # Plot the temperature -----------------------------------------------------------------
-x_vals = numpy.linspace(0, 0.6, 23, endpoint=True)
-T_vals = []
-
-for x in x_vals:
-    report = mufem.ProbeReport.SinglePoint(
-        name="Probe Report",
-        cff_name="Temperature",
-        x=x,
-        y=0.5,
-        z=0.005,
-    )
-    T_vals.append(report.evaluate())
+line = LineProbe(start=(0, 0.5, 0.005), end=(0.6, 0.5, 0.005), num=23)
+
+x_vals = line.points[:, 0]
+T_vals = line.evaluate(cff_name="Temperature")[:, 0]
 
 plt.plot(x_vals, T_vals, color="red")
 plt.xlabel("Position [m]")
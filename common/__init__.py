@@ -0,0 +1,5 @@
+"""Helpers shared by the validation cases.
+
+The case scripts add the repository root to ``sys.path`` to import them, so that
+each case can still be run on its own with ``pymufem case.py``.
+"""
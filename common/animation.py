@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import subprocess
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+def is_up_to_date(outputs, inputs=()) -> bool:
+    """Whether all `outputs` exist and are newer than all existing `inputs`."""
+
+    try:
+        oldest_output = min(os.path.getmtime(path) for path in outputs)
+    except (FileNotFoundError, ValueError):
+        return False
+
+    newest_input = max(
+        (os.path.getmtime(path) for path in inputs if os.path.exists(path)),
+        default=0.0,
+    )
+
+    return oldest_output > newest_input
+
+
+def render_frames(
+    render,
+    frames,
+    workers=1,
+    initializer=None,
+    initargs=(),
+    outputs=None,
+    inputs=None,
+    force=False,
+) -> list:
+    """Calls `render(frame)` for every frame, e.g. to save the screenshot of a
+    scene, and returns the frames which were rendered.
+
+    With `outputs(frame)` (and `inputs(frame)`) giving the files a frame writes
+    (and reads), frames whose outputs are newer than their inputs are skipped,
+    unless `force` is set, so that only the frames of changed data are rendered
+    again.
+
+    With `workers > 1` the frames are rendered by a pool of that many processes.
+    The processes are spawned, i.e. start a fresh interpreter which imports the
+    running script again, so that every worker has its own ParaView (or other
+    renderer) session; `initializer(*initargs)` is called once in every worker
+    before its first frame, e.g. to set up a rendering pipeline. `render` has to
+    be a function of the script, so that the workers can find it.
+    """
+
+    frames = [
+        frame
+        for frame in frames
+        if force
+        or outputs is None
+        or not is_up_to_date(outputs(frame), inputs(frame) if inputs else ())
+    ]
+
+    if not frames:
+        return frames
+
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+
+        for frame in frames:
+            render(frame)
+
+        return frames
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(frames)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        # Consume the results to raise the exceptions of the workers.
+        for _ in pool.map(render, frames):
+            pass
+
+    return frames
+
+
+def encode_animation(images, output_path, framerate=8, width=800, filters=()):
+    """Streams the PIL images to ffmpeg and encodes them as animation.
+
+    The images are piped to ffmpeg as they are produced (e.g. by a generator
+    combining the screenshots of a frame), no image files are written. A GIF
+    gets a palette computed from all frames, other formats (e.g. MP4) are
+    encoded with H.264. `filters` are ffmpeg filters applied first, e.g.
+    ["reverse"], and the result is scaled to `width` pixels.
+    """
+
+    filters = [
+        *filters,
+        f"fps={framerate}",
+        f"scale={width}:-1:flags=lanczos",
+    ]
+
+    if str(output_path).endswith(".gif"):
+        filters.append("split[a][b];[a]palettegen=stats_mode=full[p];[b][p]paletteuse")
+        codec = []
+    else:
+        filters.append("pad=ceil(iw/2)*2:ceil(ih/2)*2")
+        codec = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+
+    process = subprocess.Popen(
+        args=[
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "image2pipe",
+            "-c:v",
+            "ppm",
+            "-framerate",
+            str(framerate),
+            "-i",
+            "-",
+            "-vf",
+            ",".join(filters),
+            *codec,
+            str(output_path),
+        ],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    try:
+        for image in images:
+            image.convert("RGB").save(process.stdin, format="PPM")
+
+    except BrokenPipeError:
+        pass
+
+    finally:
+        process.stdin.close()
+        error = process.stderr.read().decode(errors="replace")
+        process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {output_path}:\n{error}")
@@ -0,0 +1,63 @@
+import json
+import os
+
+
+class SweepCheckpoint:
+    """Records the completed points of a sweep in a JSON file, so that a run which
+    was stopped can be restarted and skip them.
+
+    Without `resume` an existing checkpoint is discarded. Every completed point is
+    stored under `str(key)`, together with optional JSON data, e.g. the result of
+    the point, and the number of rows of a `ResultsWriter` written so far, which
+    is used as `keep_rows` when the writer is resumed. The file is replaced
+    atomically, so it always describes a consistent state.
+
+    All processes read the checkpoint, but only the main process should write it
+    (`enabled=True`).
+    """
+
+    def __init__(self, path, resume=False, enabled=True):
+
+        self.path = str(path)
+        self.rows = 0
+
+        self._enabled = enabled
+        self._completed = {}
+
+        if resume and os.path.exists(self.path):
+            with open(self.path) as fp:
+                state = json.load(fp)
+
+            self._completed = state["completed"]
+            self.rows = state["rows"]
+
+        elif enabled and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __contains__(self, key) -> bool:
+        return str(key) in self._completed
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def get(self, key):
+        return self._completed[str(key)]
+
+    def complete(self, key, data=None, results=None):
+        """Marks the point `key` as completed, after flushing `results`."""
+
+        if results is not None:
+            results.flush()
+            self.rows = len(results.rows)
+
+        self._completed[str(key)] = data
+
+        if not self._enabled:
+            return
+
+        with open(f"{self.path}.tmp", "w") as fp:
+            json.dump({"completed": self._completed, "rows": self.rows}, fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+
+        os.replace(f"{self.path}.tmp", self.path)
@@ -0,0 +1,95 @@
+import json
+import os
+
+
+class ThrottledFieldExporter:
+    """Wraps the field exporter of a simulation, so that `save` only writes the
+    fields on every `every`-th call, e.g. every few time steps of a transient
+    run.
+
+    The first call always saves, so the initial state is part of the output.
+    `steps` lists the calls (counted from 0) which saved, the n-th of them is
+    written as `Output_{n}`.
+
+    Every saved output is also listed with its time in a ParaView file series
+    (`Animation.vtpc.series`), which opens all outputs as one time series, and
+    with its time, step and the keyword arguments passed to `save` (e.g. the
+    rotation rate) in `Animation.json`, both in `directory`. Use
+    `read_series_metadata` to read them back, e.g. in an animation script. On
+    processes other than the main process pass `enabled=False`.
+    """
+
+    def __init__(
+        self, field_exporter, every=1, directory="VisualizationOutput", enabled=True
+    ):
+
+        if every < 1:
+            raise ValueError(f"The export interval has to be at least 1, got {every}.")
+
+        self.field_exporter = field_exporter
+        self.every = every
+        self.directory = str(directory)
+        self.enabled = enabled
+        self.steps = []
+        self.outputs = []
+
+        self._calls = 0
+
+    def add_field_output(self, name):
+        self.field_exporter.add_field_output(name)
+
+    def save(self, time=None, **metadata) -> bool:
+
+        step = self._calls
+        self._calls += 1
+
+        if step % self.every != 0:
+            return False
+
+        self.field_exporter.save()
+        self.steps.append(step)
+        self.outputs.append(
+            {
+                "name": f"Output_{len(self.outputs)}.vtpc",
+                "time": step if time is None else time,
+                "step": step,
+                **metadata,
+            }
+        )
+
+        if self.enabled:
+            self._write_series()
+
+        return True
+
+    def _write_series(self):
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        series = {
+            "file-series-version": "1.0",
+            "files": [
+                {"name": output["name"], "time": output["time"]}
+                for output in self.outputs
+            ],
+        }
+
+        # Write to temporary files first, so that both files are always complete.
+        for name, content in [
+            ("Animation.vtpc.series", series),
+            ("Animation.json", self.outputs),
+        ]:
+            path = os.path.join(self.directory, name)
+
+            with open(f"{path}.tmp", "w") as fp:
+                json.dump(content, fp, indent=1, default=float)
+
+            os.replace(f"{path}.tmp", path)
+
+
+def read_series_metadata(directory="VisualizationOutput") -> list:
+    """Reads the outputs written by a `ThrottledFieldExporter`, one dictionary
+    with the file name, time, step and metadata per output."""
+
+    with open(os.path.join(directory, "Animation.json")) as fp:
+        return json.load(fp)
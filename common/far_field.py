@@ -0,0 +1,128 @@
+import itertools
+
+import numpy
+
+from mufem.electromagnetics.timeharmonicmaxwell import FarFieldRadiationSensor
+
+# Numbers the sensors created by `evaluate_far_field`, so that their names are unique.
+_sensor_numbers = itertools.count()
+
+
+def _equally_spaced_runs(values) -> list:
+
+    # Splits sorted values into runs of consecutive values with equal spacing.
+    runs = []
+    start = 0
+
+    while start < len(values):
+        end = start + 1
+
+        if end < len(values):
+            step = values[end] - values[start]
+
+            while end + 1 < len(values) and numpy.isclose(
+                values[end + 1] - values[end], step
+            ):
+                end += 1
+
+            end += 1
+
+        runs.append(values[start:end])
+        start = end
+
+    return runs
+
+
+def _limits(angles):
+
+    # The step of a single angle does not matter, but has to be positive.
+    step = angles[1] - angles[0] if len(angles) > 1 else 1.0
+
+    return float(angles[0]), float(angles[-1]), float(step)
+
+
+def _indices(requested, returned):
+
+    indices = numpy.argmin(numpy.abs(requested[:, None] - returned[None, :]), axis=1)
+
+    if not numpy.allclose(returned[indices], requested, atol=1e-6):
+        raise ValueError("The far-field sensor did not return the requested angles.")
+
+    return indices
+
+
+def far_field_grid(polar_angles, azimuthal_angles, name="Far Field") -> numpy.ndarray:
+    """Evaluates the far-field radiation pattern on the grid of the given polar and
+    azimuthal angles [deg] with one `FarFieldRadiationSensor`.
+
+    Both sets of angles have to be equally spaced, a single angle gives a
+    degenerate grid, e.g. a cut at fixed azimuthal angle. Returns an array of
+    shape (number of polar angles, number of azimuthal angles).
+    """
+
+    polar_angles = numpy.atleast_1d(numpy.asarray(polar_angles, dtype=float))
+    azimuthal_angles = numpy.atleast_1d(numpy.asarray(azimuthal_angles, dtype=float))
+
+    polar_start, polar_stop, polar_step = _limits(polar_angles)
+    azimuthal_start, azimuthal_stop, azimuthal_step = _limits(azimuthal_angles)
+
+    sensor = FarFieldRadiationSensor(
+        name,
+        polar_start=polar_start,
+        polar_stop=polar_stop,
+        polar_step=polar_step,
+        azimuthal_start=azimuthal_start,
+        azimuthal_stop=azimuthal_stop,
+        azimuthal_step=azimuthal_step,
+    )
+
+    # The sensor returns its angles in radians.
+    polar = numpy.degrees(numpy.array(sensor.get_polar_angles(), dtype=float))
+    azimuthal = numpy.degrees(numpy.array(sensor.get_azimuthal_angles(), dtype=float))
+
+    pattern = numpy.array(sensor.get_radiation_pattern(), dtype=float)
+    pattern = pattern.reshape(len(polar), len(azimuthal))
+
+    return pattern[
+        numpy.ix_(_indices(polar_angles, polar), _indices(azimuthal_angles, azimuthal))
+    ]
+
+
+def evaluate_far_field(angles, name="Far Field") -> numpy.ndarray:
+    """Evaluates the far-field radiation pattern at an (N, 2) array of (polar,
+    azimuthal) angles [deg], e.g. the angles of a cut through the pattern.
+
+    The angles are grouped by the kind of angle with fewer distinct values, and
+    every equally spaced run of the other angles in a group is evaluated as one
+    (degenerate) grid with `far_field_grid`. A cut at fixed azimuthal angle thus
+    costs a single sensor evaluation instead of a dense sphere. Returns an (N,)
+    array.
+
+    Every sensor is named `name` followed by a running number. Angles which do not
+    line up, e.g. scattered points, still cost one sensor evaluation per angle.
+    """
+
+    angles = numpy.asarray(angles, dtype=float).reshape(-1, 2)
+    values = numpy.empty(len(angles))
+
+    polar, azimuthal = angles.T
+    by_azimuthal = len(numpy.unique(azimuthal)) <= len(numpy.unique(polar))
+
+    fixed, varying = (azimuthal, polar) if by_azimuthal else (polar, azimuthal)
+
+    for value in numpy.unique(fixed):
+        rows = numpy.flatnonzero(fixed == value)
+
+        for run in _equally_spaced_runs(numpy.unique(varying[rows])):
+
+            sensor_name = f"{name} {next(_sensor_numbers)}"
+
+            if by_azimuthal:
+                pattern = far_field_grid(run, value, name=sensor_name)[:, 0]
+            else:
+                pattern = far_field_grid(value, run, name=sensor_name)[0, :]
+
+            in_run = rows[numpy.isin(varying[rows], run)]
+            values[in_run] = pattern[numpy.searchsorted(run, varying[in_run])]
+
+    return values
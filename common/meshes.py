@@ -0,0 +1,512 @@
+import gzip
+import itertools
+import mmap
+import os
+import queue
+import threading
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy
+
+# Gmsh element type: (dimension, number of nodes).
+gmsh_element_types = {
+    1: (1, 2),  # line
+    2: (2, 3),  # triangle
+    3: (2, 4),  # quadrangle
+    4: (3, 4),  # tetrahedron
+    5: (3, 8),  # hexahedron
+    6: (3, 6),  # prism
+    7: (3, 5),  # pyramid
+    8: (1, 3),  # second order line
+    9: (2, 6),  # second order triangle
+    10: (2, 9),  # second order quadrangle
+    11: (3, 10),  # second order tetrahedron
+    15: (0, 1),  # point
+    16: (2, 8),  # serendipity quadrangle
+    17: (3, 20),  # serendipity hexahedron
+}
+
+# MFEM geometry type -> Gmsh element type, the vertex order of these is the same.
+mfem_to_gmsh_element_types = {0: 15, 1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 7}
+
+
+@dataclass
+class ElementBlock:
+    element_type: int  # Gmsh element type
+    attributes: numpy.ndarray  # (n,) physical tag of every element
+    nodes: numpy.ndarray  # (n, k) zero based node indices
+
+    @property
+    def dimension(self) -> int:
+        return gmsh_element_types[self.element_type][0]
+
+
+@dataclass
+class MeshData:
+    nodes: numpy.ndarray  # (N, 3) node coordinates
+    blocks: List[ElementBlock] = field(default_factory=list)
+    physical_names: Dict[Tuple[int, int], str] = field(default_factory=dict)
+
+
+def _is_gzip(path) -> bool:
+
+    with open(path, "rb") as fp:
+        return fp.read(2) == b"\x1f\x8b"
+
+
+def _read_bytes(path) -> bytes:
+
+    with (gzip.open if _is_gzip(path) else open)(path, "rb") as fp:
+        return fp.read()
+
+
+def _find(content, sub, start=0) -> int:
+
+    position = content.find(sub, start)
+
+    if position < 0:
+        raise ValueError(f"Missing {sub!r} in the mesh file.")
+
+    return position
+
+
+def _attribute_names(lines, dimension, names):
+
+    # "name" n attribute_1 ... attribute_n; the sets have to be disjoint, since a
+    # Gmsh physical tag has exactly one name.
+    for line in lines:
+        name, _, values = line.rpartition('"')
+        attributes = [int(value) for value in values.split()[1:]]
+
+        for attribute in attributes:
+            if (dimension, attribute) in names:
+                raise ValueError(
+                    f'Attribute {attribute} is in the sets "{name[1:]}" and '
+                    f'"{names[dimension, attribute]}", but the attribute sets have '
+                    "to be disjoint to be stored as Gmsh physical names."
+                )
+
+            names[dimension, attribute] = name[1:]
+
+
+def _stream_lines(path, chunk_size=1 << 22):
+    """Yields the lines of a (gzip compressed) text file as bytes.
+
+    The file is read and decompressed in chunks on a background thread, so that
+    decompressing the next chunk overlaps with parsing the lines of the current
+    one and the inflated text is never in memory as a whole.
+    """
+
+    chunks = queue.Queue(maxsize=4)
+
+    def decompress():
+        try:
+            with (gzip.open if _is_gzip(path) else open)(path, "rb") as fp:
+                while chunk := fp.read(chunk_size):
+                    chunks.put(chunk)
+        except Exception as error:
+            chunks.put(error)
+        else:
+            chunks.put(None)
+
+    threading.Thread(target=decompress, daemon=True).start()
+
+    remainder = b""
+
+    while (chunk := chunks.get()) is not None:
+        if isinstance(chunk, Exception):
+            raise chunk
+
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+
+        yield from lines
+
+    if remainder:
+        yield remainder
+
+
+def _next_line(lines) -> bytes:
+
+    # The next line which is neither empty nor a comment.
+    for line in lines:
+        line = line.strip()
+
+        if line and not line.startswith(b"#"):
+            return line
+
+    raise ValueError("Unexpected end of the mesh file.")
+
+
+def _read_tables(lines, count, dtype, key_columns, width=None, batch_size=1 << 16):
+    """Parses `count` lines of numbers into tables, one per distinct value of the
+    `key_columns`, e.g. the element geometry, in batches of `batch_size` lines.
+
+    `width(key)` gives the number of values in a line with the given key.
+    """
+
+    tables = {}
+
+    for start in range(0, count, batch_size):
+        batch = list(itertools.islice(lines, min(batch_size, count - start)))
+
+        if len(batch) < min(batch_size, count - start):
+            raise ValueError("Unexpected end of the mesh file.")
+
+        # Fast path for batches of lines with the same number of values.
+        values = numpy.fromstring(b" ".join(batch).decode(), dtype=dtype, sep=" ")
+        width_ = len(batch[0].split())
+
+        if len(values) == len(batch) * width_:
+            table = values.reshape(len(batch), width_)
+            keys = table[:, key_columns]
+
+            key = tuple(keys[0].tolist())
+
+            if (keys == keys[0]).all() and (width is None or width(key) == width_):
+                tables.setdefault(key, []).append(table)
+                continue
+
+        # Lines of different lengths, gather the rows of every length separately.
+        widths = numpy.fromiter((len(line.split()) for line in batch), int, len(batch))
+        offsets = numpy.cumsum(widths) - widths
+
+        if len(values) != widths.sum():
+            values = numpy.array(b" ".join(batch).split(), dtype=dtype)
+
+        parts = []
+
+        for width_ in numpy.unique(widths):
+            rows = numpy.flatnonzero(widths == width_)
+            table = values[offsets[rows, None] + numpy.arange(width_)]
+
+            keys, first, inverse = numpy.unique(
+                table[:, key_columns], axis=0, return_index=True, return_inverse=True
+            )
+
+            for k, key in enumerate(keys):
+                key = tuple(key.tolist())
+
+                if width is not None and width(key) != width_:
+                    raise ValueError(f"Unexpected line length {width_} for {key}.")
+
+                parts.append((rows[first[k]], key, table[inverse.ravel() == k]))
+
+        # Keep the keys in the order they first appear in the file.
+        for _, key, table in sorted(parts, key=lambda part: part[0]):
+            tables.setdefault(key, []).append(table)
+
+    return {key: numpy.concatenate(table) for key, table in tables.items()}
+
+
+def _mfem_vertices(geometry) -> int:
+    return gmsh_element_types[mfem_to_gmsh_element_types[geometry]][1]
+
+
+def read_mfem_mesh(path) -> MeshData:
+    """Reads a (gzip compressed) MFEM mesh v1.3 file with straight elements."""
+
+    lines = _stream_lines(path)
+
+    if not next(lines, b"").startswith(b"MFEM mesh v1."):
+        raise ValueError(f"{path} is not an MFEM mesh v1.x file.")
+
+    dimension = None
+    nodes = None
+    physical_names = {}
+    blocks = []
+
+    # Every section starts with a keyword followed by a line with its length.
+    for line in lines:
+        keyword = line.strip().decode()
+
+        if keyword in ("", "mfem_mesh_end") or keyword.startswith("#"):
+            continue
+
+        if keyword == "dimension":
+            dimension = int(_next_line(lines))
+
+        elif keyword in ("elements", "boundary"):
+            count = int(_next_line(lines))
+            tables = _read_tables(
+                lines=lines,
+                count=count,
+                dtype=numpy.int64,
+                key_columns=[1],
+                width=lambda key: 2 + _mfem_vertices(key[0]),
+            )
+
+            blocks += [
+                ElementBlock(
+                    element_type=mfem_to_gmsh_element_types[geometry],
+                    attributes=table[:, 0],
+                    nodes=table[:, 2:],
+                )
+                for (geometry,), table in tables.items()
+            ]
+
+        elif keyword in ("attribute_sets", "bdr_attribute_sets"):
+            count = int(_next_line(lines))
+            set_lines = [_next_line(lines).decode() for _ in range(count)]
+
+            _attribute_names(
+                lines=set_lines,
+                dimension=dimension if keyword == "attribute_sets" else dimension - 1,
+                names=physical_names,
+            )
+
+        elif keyword == "vertices":
+            count = int(_next_line(lines))
+            line = next(lines, b"").strip()
+
+            if not line:
+                raise ValueError(f"{path} has curved (high order) nodes.")
+
+            vertex_dimension = int(line)
+            tables = _read_tables(lines=lines, count=count, dtype=float, key_columns=[])
+
+            nodes = numpy.zeros((count, 3))
+            nodes[:, range(vertex_dimension)] = tables[()]
+
+        elif keyword == "nodes":
+            raise ValueError(f"{path} has curved (high order) nodes.")
+
+        else:
+            raise ValueError(f'{path} has the unsupported section "{keyword}".')
+
+    return MeshData(nodes=nodes, blocks=blocks, physical_names=physical_names)
+
+
+def _gmsh_sections(content):
+
+    # Maps every "$Name" to the range between its line and "$EndName".
+    sections = {}
+    position = 0
+
+    while True:
+        start = content.find(b"$", position)
+
+        if start < 0:
+            return sections
+
+        end_of_line = _find(content, b"\n", start)
+        name = content[start:end_of_line].strip().decode()[1:]
+        end = _find(content, b"\n$End" + name.encode(), end_of_line)
+
+        sections[name] = (end_of_line + 1, end)
+        position = end + len(name) + 5
+
+
+def _physical_names(lines):
+
+    names = {}
+
+    for line in lines:
+        dimension, tag, name = line.decode().split(maxsplit=2)
+        names[int(dimension), int(tag)] = name.strip().strip('"')
+
+    return names
+
+
+def read_gmsh_mesh(path) -> MeshData:
+    """Reads a Gmsh 2.2 mesh file, ASCII or binary, optionally gzip compressed.
+
+    ASCII files are decompressed and parsed in chunks. Uncompressed binary files
+    are memory mapped instead of read, so that their node and element blocks are
+    taken straight from the mapped file.
+    """
+
+    with (gzip.open if _is_gzip(path) else open)(path, "rb") as fp:
+        fp.readline()
+        version, binary, _ = fp.readline().split()
+
+    if not version.startswith(b"2."):
+        raise ValueError(f"{path} has the unsupported Gmsh version {version}.")
+
+    if not int(binary):
+        nodes, node_tags, blocks, physical_names = _read_gmsh_ascii(path)
+
+    else:
+        if _is_gzip(path):
+            content = _read_bytes(path)
+        else:
+            with open(path, "rb") as fp:
+                content = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        sections = _gmsh_sections(content)
+        nodes, node_tags, blocks = _read_gmsh_binary(content, sections)
+
+        physical_names = {}
+
+        if "PhysicalNames" in sections:
+            start, end = sections["PhysicalNames"]
+            physical_names = _physical_names(content[start:end].split(b"\n")[1:])
+
+    # Node tags do not have to be consecutive, the blocks use zero based indices.
+    index = numpy.zeros(int(node_tags.max()) + 1, dtype=numpy.int64)
+    index[node_tags] = numpy.arange(len(node_tags))
+
+    for block in blocks:
+        block.nodes = index[block.nodes]
+
+    return MeshData(nodes=nodes, blocks=blocks, physical_names=physical_names)
+
+
+def _read_gmsh_ascii(path):
+
+    lines = _stream_lines(path)
+
+    physical_names = {}
+    blocks = []
+
+    for line in lines:
+        section = line.strip()
+
+        if section == b"$PhysicalNames":
+            count = int(_next_line(lines))
+            physical_names = _physical_names([_next_line(lines) for _ in range(count)])
+
+        elif section == b"$Nodes":
+            count = int(_next_line(lines))
+            table = _read_tables(lines=lines, count=count, dtype=float, key_columns=[])
+
+            nodes = table[()][:, 1:]
+            node_tags = table[()][:, 0].astype(numpy.int64)
+
+        elif section == b"$Elements":
+            count = int(_next_line(lines))
+
+            # number type ntags tag_1 ... tag_ntags node_1 ... node_k
+            tables = _read_tables(
+                lines=lines,
+                count=count,
+                dtype=numpy.int64,
+                key_columns=[1, 2],
+                width=lambda key: 3 + key[1] + gmsh_element_types[key[0]][1],
+            )
+
+            blocks = [
+                ElementBlock(
+                    element_type=element_type,
+                    attributes=table[:, 3],
+                    nodes=table[:, 3:][:, number_of_tags:],
+                )
+                for (element_type, number_of_tags), table in tables.items()
+            ]
+
+    return nodes, node_tags, blocks, physical_names
+
+
+def _read_gmsh_binary(content, sections):
+
+    def array(offset, dtype, count):
+        return numpy.frombuffer(content, dtype=dtype, count=count, offset=offset)
+
+    start, _ = sections["Nodes"]
+    end_of_line = _find(content, b"\n", start)
+    count = int(content[start:end_of_line])
+
+    table = array(
+        end_of_line + 1, numpy.dtype([("tag", "<i4"), ("xyz", "<f8", 3)]), count
+    )
+
+    nodes = table["xyz"]
+    node_tags = table["tag"].astype(numpy.int64)
+
+    start, _ = sections["Elements"]
+    end_of_line = _find(content, b"\n", start)
+    remaining = int(content[start:end_of_line])
+    position = end_of_line + 1
+
+    blocks = []
+
+    # Blocks of elements of one type: header (type, count, ntags), then per element
+    # number, tags and nodes, all as 32 bit integers.
+    while remaining > 0:
+        element_type, count, number_of_tags = array(position, "<i4", 3).tolist()
+        width = 1 + number_of_tags + gmsh_element_types[element_type][1]
+
+        table = array(position + 12, "<i4", count * width).reshape(count, width)
+
+        blocks.append(
+            ElementBlock(
+                element_type=element_type,
+                attributes=table[:, 1].astype(numpy.int64),
+                nodes=table[:, 1:][:, number_of_tags:].astype(numpy.int64),
+            )
+        )
+
+        position += 12 + 4 * count * width
+        remaining -= count
+
+    return nodes, node_tags, blocks
+
+
+def read_mesh(path) -> MeshData:
+    """Reads an MFEM mesh v1.3 or a Gmsh 2.2 file, whatever the file extension."""
+
+    with (gzip.open if _is_gzip(path) else open)(path, "rb") as fp:
+        header = fp.read(16)
+
+    if header.startswith(b"MFEM mesh"):
+        return read_mfem_mesh(path)
+
+    if header.startswith(b"$MeshFormat"):
+        return read_gmsh_mesh(path)
+
+    raise ValueError(f"{path} is neither an MFEM nor a Gmsh mesh file.")
+
+
+def write_gmsh_binary(mesh: MeshData, path):
+    """Writes the mesh as binary Gmsh 2.2 file, which μfem loads without parsing
+    text. The file is written to a temporary file first and then moved to `path`.
+    """
+
+    with open(f"{path}.tmp", "wb") as fp:
+        fp.write(b"$MeshFormat\n2.2 1 8\n")
+        fp.write(numpy.array([1], dtype="<i4").tobytes())
+        fp.write(b"\n$EndMeshFormat\n")
+
+        if mesh.physical_names:
+            fp.write(f"$PhysicalNames\n{len(mesh.physical_names)}\n".encode())
+
+            for (dimension, tag), name in sorted(mesh.physical_names.items()):
+                fp.write(f'{dimension} {tag} "{name}"\n'.encode())
+
+            fp.write(b"$EndPhysicalNames\n")
+
+        nodes = numpy.empty(
+            len(mesh.nodes), dtype=numpy.dtype([("tag", "<i4"), ("xyz", "<f8", 3)])
+        )
+        nodes["tag"] = numpy.arange(1, len(mesh.nodes) + 1)
+        nodes["xyz"] = mesh.nodes
+
+        fp.write(f"$Nodes\n{len(nodes)}\n".encode())
+        fp.write(nodes.tobytes())
+        fp.write(b"\n$EndNodes\n")
+
+        count = sum(len(block.attributes) for block in mesh.blocks)
+        fp.write(f"$Elements\n{count}\n".encode())
+
+        number = 1
+
+        # Two tags per element, the physical and the elementary (geometrical) tag.
+        for block in mesh.blocks:
+            n = len(block.attributes)
+
+            table = numpy.empty((n, 3 + block.nodes.shape[1]), dtype="<i4")
+            table[:, 0] = numpy.arange(number, number + n)
+            table[:, 1] = block.attributes
+            table[:, 2] = block.attributes
+            table[:, 3:] = block.nodes + 1
+
+            fp.write(numpy.array([block.element_type, n, 2], dtype="<i4").tobytes())
+            fp.write(table.tobytes())
+
+            number += n
+
+        fp.write(b"\n$EndElements\n")
+
+    os.replace(f"{path}.tmp", path)
@@ -0,0 +1,136 @@
+import numpy
+
+import mufem
+
+
+def _components(value):
+
+    # Vector fields are returned as objects with components, scalar fields as
+    # plain numbers.
+    if hasattr(value, "x"):
+        return (value.x, value.y, value.z)
+
+    return (value,)
+
+
+class ProbeSet:
+    """A fixed set of probe points which can be evaluated for several fields.
+
+    The probe reports of a field are created on its first evaluation and then
+    kept, so evaluating the set again, e.g. after every time step of an
+    `UnsteadyRunner`, reuses them instead of setting up the points again.
+    """
+
+    def __init__(self, points):
+
+        self._points = numpy.ascontiguousarray(points, dtype=float).reshape(-1, 3)
+        self._reports = {}
+
+    @property
+    def points(self) -> numpy.ndarray:
+        return self._points
+
+    def _field_reports(self, cff_name: str):
+
+        if cff_name not in self._reports:
+            self._reports[cff_name] = [
+                mufem.ProbeReport.SinglePoint(
+                    name=f"{cff_name} Probe", cff_name=cff_name, x=x, y=y, z=z
+                )
+                for x, y, z in self._points
+            ]
+
+        return self._reports[cff_name]
+
+    def evaluate(self, cff_name: str) -> numpy.ndarray:
+        """Returns an (N, k) array with k = 1 for scalar and k = 3 for vector fields."""
+
+        values = [
+            _components(report.evaluate()) for report in self._field_reports(cff_name)
+        ]
+
+        if not values:
+            return numpy.empty((0, 1))
+
+        return numpy.array(values, dtype=float)
+
+
+def probe_points(cff_name: str, points) -> numpy.ndarray:
+    """Evaluates the field `cff_name` once at an (N, 3) array of points.
+
+    Returns an (N, k) array with k = 1 for scalar and k = 3 for vector fields.
+    Use a `ProbeSet` to evaluate the same points repeatedly.
+    """
+
+    return ProbeSet(points=points).evaluate(cff_name=cff_name)
+
+
+class LineProbe(ProbeSet):
+    """`num` equally spaced points on the line from `start` to `end` (inclusive)."""
+
+    def __init__(self, start, end, num: int):
+
+        start = numpy.asarray(start, dtype=float)
+        end = numpy.asarray(end, dtype=float)
+
+        self.parameters = numpy.linspace(0.0, 1.0, num)
+        self.distances = self.parameters * numpy.linalg.norm(end - start)
+
+        super().__init__(points=start + numpy.outer(self.parameters, end - start))
+
+
+class PlaneProbe(ProbeSet):
+    """A `num_u` x `num_v` grid of points on the plane spanned from `origin` by the
+    edge vectors `u` and `v`.
+
+    `evaluate` returns a (num_u, num_v, k) array.
+    """
+
+    def __init__(self, origin, u, v, num_u: int, num_v: int):
+
+        s, t = numpy.meshgrid(
+            numpy.linspace(0.0, 1.0, num_u),
+            numpy.linspace(0.0, 1.0, num_v),
+            indexing="ij",
+        )
+
+        points = (
+            numpy.asarray(origin, dtype=float)
+            + s[..., None] * numpy.asarray(u, dtype=float)
+            + t[..., None] * numpy.asarray(v, dtype=float)
+        )
+
+        self.shape = (num_u, num_v)
+
+        super().__init__(points=points)
+
+    def evaluate(self, cff_name: str) -> numpy.ndarray:
+
+        values = super().evaluate(cff_name=cff_name)
+
+        return values.reshape(self.shape + (values.shape[-1],))
+
+
+class GridProbe(ProbeSet):
+    """A structured grid of points in the box from `start` to `stop`, with `num`
+    points along each of the three axes.
+
+    `evaluate` returns a (num[0], num[1], num[2], k) array.
+    """
+
+    def __init__(self, start, stop, num):
+
+        axes = [numpy.linspace(start[i], stop[i], num[i]) for i in range(3)]
+
+        self.axes = axes
+        self.shape = tuple(len(axis) for axis in axes)
+
+        super().__init__(
+            points=numpy.stack(numpy.meshgrid(*axes, indexing="ij"), axis=-1)
+        )
+
+    def evaluate(self, cff_name: str) -> numpy.ndarray:
+
+        values = super().evaluate(cff_name=cff_name)
+
+        return values.reshape(self.shape + (values.shape[-1],))
@@ -0,0 +1,116 @@
+import os
+
+import numpy
+
+
+class ResultsWriter:
+    """Streams the rows of a sweep to a CSV file while the sweep is running.
+
+    The file is opened once and written through a buffer, `flush` forces the
+    rows written so far to disk, e.g. after every finished sweep step. With
+    `resume=True` the rows of an existing file are kept and available in `rows`,
+    a partial last line left behind by a crash is cut off, and with `keep_rows`
+    only that many rows are kept, e.g. the rows of the completed points of a
+    `SweepCheckpoint`. `close` (or leaving the `with` block) additionally saves
+    the columns as arrays in an NPZ file next to the CSV file.
+
+    On processes other than the main process pass `enabled=False`, the rows are
+    then only collected in `rows` and the file is never modified.
+    """
+
+    def __init__(
+        self, path, columns, header=None, resume=False, keep_rows=None, enabled=True
+    ):
+
+        self.path = str(path)
+        self.columns = tuple(columns)
+        self.rows = []
+
+        self._file = None
+
+        resume = resume and os.path.exists(self.path)
+
+        if resume:
+            self._read_existing(keep_rows=keep_rows, truncate=enabled)
+
+        if not enabled:
+            return
+
+        if resume:
+            self._file = open(self.path, "a")
+        else:
+            self._file = open(self.path, "w")
+            self._file.write(f"# {header or ', '.join(self.columns)}\n")
+            self.flush()
+
+    def _read_existing(self, keep_rows, truncate):
+
+        with open(self.path, "rb+" if truncate else "rb") as fp:
+            content = fp.read()
+
+            # Drop a partial last line, the write was interrupted.
+            end = content.rfind(b"\n") + 1
+            position = 0
+
+            for line in content[:end].splitlines(keepends=True):
+                if line.strip() and not line.startswith(b"#"):
+                    if keep_rows is not None and len(self.rows) == keep_rows:
+                        break
+
+                    self.rows.append(tuple(float(value) for value in line.split(b",")))
+
+                position += len(line)
+
+            if truncate:
+                fp.truncate(position)
+
+    def write(self, *values):
+
+        if len(values) != len(self.columns):
+            raise ValueError(
+                f"Expected {len(self.columns)} values ({', '.join(self.columns)}), "
+                f"got {len(values)}."
+            )
+
+        self.rows.append(values)
+
+        if self._file is not None:
+            self._file.write(", ".join(f"{value}" for value in values) + "\n")
+
+    def flush(self):
+
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def to_numpy(self) -> numpy.ndarray:
+        return numpy.array(self.rows, dtype=float).reshape(-1, len(self.columns))
+
+    def save_npz(self):
+
+        data = self.to_numpy()
+        path = os.path.splitext(self.path)[0]
+
+        # Write to a temporary file first, so that the NPZ file is always complete.
+        numpy.savez(
+            f"{path}.tmp.npz",
+            **{name: data[:, i] for i, name in enumerate(self.columns)},
+        )
+        os.replace(f"{path}.tmp.npz", f"{path}.npz")
+
+    def close(self):
+
+        if self._file is None:
+            return
+
+        self.flush()
+        self._file.close()
+        self._file = None
+
+        self.save_npz()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,339 @@
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy
+
+
+def frequency_sweep(solve, frequencies, verbose=True, checkpoint=None) -> numpy.ndarray:
+    """Calls `solve(frequency)` for every frequency and stacks the results.
+
+    The frequencies are solved in ascending order, whatever order they are
+    given in, so that every solve follows the closest frequency solved before
+    and the solver state it leaves behind is as good a starting point as
+    possible. The returned array is in the order of `frequencies`, with the
+    shape of a single result appended.
+
+    With a `SweepCheckpoint` the result of every frequency is stored in the
+    checkpoint, and frequencies found there are not solved again.
+    """
+
+    frequencies = numpy.asarray(frequencies, dtype=float)
+    order = numpy.argsort(frequencies, kind="stable")
+
+    if len(frequencies) == 0:
+        return numpy.empty(0)
+
+    results = None
+
+    for n, i in enumerate(order):
+
+        if checkpoint is not None and frequencies[i] in checkpoint:
+            data = checkpoint.get(frequencies[i])
+            result = numpy.asarray(data["real"]) + 1j * numpy.asarray(data["imag"])
+
+        else:
+            if verbose:
+                print(f"\nFrequency {n+1} of {len(frequencies)}...")
+
+            result = numpy.asarray(solve(frequencies[i]))
+
+            if checkpoint is not None:
+                checkpoint.complete(
+                    key=frequencies[i],
+                    data={
+                        "real": result.real.tolist(),
+                        "imag": result.imag.tolist(),
+                    },
+                )
+
+        if results is None:
+            results = numpy.empty(
+                (len(frequencies),) + result.shape, dtype=result.dtype
+            )
+
+        results[i] = result
+
+    return results
+
+
+def _aaa(z, f, max_terms):
+    """Rational barycentric approximation of the samples `f` at the points `z`
+    using the AAA algorithm of Nakatsukasa, Sète and Trefethen (2018).
+
+    Returns the support points, support values and barycentric weights.
+    """
+
+    remaining = numpy.ones(len(z), dtype=bool)
+    approximation = numpy.full(len(z), numpy.mean(f), dtype=complex)
+
+    support = []
+    cauchy = numpy.empty((len(z), 0), dtype=complex)
+    weights = numpy.ones(1, dtype=complex)
+
+    for _ in range(min(max_terms, len(z))):
+
+        # Greedily add the sample with the largest error as support point.
+        j = numpy.argmax(numpy.where(remaining, numpy.abs(f - approximation), -1.0))
+
+        support.append(j)
+        remaining[j] = False
+
+        with numpy.errstate(divide="ignore"):
+            cauchy = numpy.column_stack((cauchy, 1.0 / (z - z[j])))
+
+        if not remaining.any():
+            break
+
+        # The weights minimize the linearized residual on the remaining samples.
+        loewner = (
+            f[remaining, None] * cauchy[remaining] - cauchy[remaining] * f[support]
+        )
+        weights = numpy.linalg.svd(loewner)[2][-1].conj()
+
+        approximation = f.astype(complex)
+        approximation[remaining] = (cauchy[remaining] @ (weights * f[support])) / (
+            cauchy[remaining] @ weights
+        )
+
+        if numpy.max(numpy.abs(f - approximation)) <= 1e-13 * numpy.max(numpy.abs(f)):
+            break
+
+    if len(weights) != len(support):
+        weights = numpy.ones(len(support), dtype=complex)
+
+    return z[support], f[support], weights
+
+
+def _evaluate_barycentric(zz, support_points, support_values, weights):
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        cauchy = 1.0 / (zz[:, None] - support_points[None, :])
+        values = (cauchy @ (weights * support_values)) / (cauchy @ weights)
+
+    # At the support points the barycentric formula is 0/0, but interpolates.
+    rows, columns = numpy.nonzero(zz[:, None] == support_points[None, :])
+    values[rows] = support_values[columns]
+
+    return values
+
+
+def _rational_model(frequencies, samples, max_terms):
+    """Fits every entry of the sampled results with its own rational function
+    and returns a function evaluating all entries at given frequencies."""
+
+    # Map the frequency band to [-1, 1] for a well conditioned fit.
+    center = 0.5 * (frequencies.max() + frequencies.min())
+    scale = 0.5 * (frequencies.max() - frequencies.min()) or 1.0
+
+    z = (frequencies - center) / scale
+    entries = samples.reshape(len(samples), -1)
+    fits = [
+        _aaa(z=z, f=entries[:, k], max_terms=max_terms) for k in range(entries.shape[1])
+    ]
+
+    def model(frequencies_out):
+        zz = (numpy.asarray(frequencies_out, dtype=float) - center) / scale
+        values = numpy.column_stack([_evaluate_barycentric(zz, *fit) for fit in fits])
+        return values.reshape((len(zz),) + samples.shape[1:])
+
+    return model
+
+
+def adaptive_frequency_sweep(
+    solve,
+    frequencies,
+    tolerance=1e-3,
+    initial_points=5,
+    include=(),
+    max_solves=None,
+    verbose=True,
+) -> numpy.ndarray:
+    """Approximates the results of `solve(frequency)` over all `frequencies` from
+    a small number of full solves.
+
+    Starting from `initial_points` equally spaced frequencies (and the ones
+    closest to the frequencies in `include`), the results are fitted with a
+    rational model (AAA), which captures the resonances of S-parameters with
+    few samples. The next frequency solved is where the two latest models
+    disagree most. The sweep stops once the model predicted the results of
+    two consecutive new solves within `tolerance` (absolute, per entry).
+
+    Returns an array of the same layout as `frequency_sweep`, in which the
+    solved frequencies hold the exact results and the others the model.
+    """
+
+    frequencies = numpy.asarray(frequencies, dtype=float)
+    max_solves = max_solves or len(frequencies)
+
+    solved = set(numpy.linspace(0, len(frequencies) - 1, initial_points).astype(int))
+    solved |= {int(numpy.argmin(numpy.abs(frequencies - f))) for f in include}
+
+    results = {}
+
+    def solve_index(i):
+        if verbose:
+            print(f"\nFrequency {len(results)+1} (f = {frequencies[i]:.6g} Hz)...")
+        results[i] = numpy.asarray(solve(frequencies[i]))
+
+    for i in sorted(solved):
+        solve_index(i)
+
+    previous_model = None
+    converged_solves = 0
+
+    while len(results) < min(max_solves, len(frequencies)):
+
+        indices = numpy.array(sorted(results))
+        samples = numpy.array([results[i] for i in indices])
+
+        model = _rational_model(
+            frequencies=frequencies[indices],
+            samples=samples,
+            max_terms=(len(indices) + 1) // 2,
+        )
+
+        unsolved = numpy.setdiff1d(numpy.arange(len(frequencies)), indices)
+        prediction = model(frequencies[unsolved])
+
+        if previous_model is None:
+            difference = numpy.ones(len(unsolved))
+        else:
+            difference = numpy.abs(prediction - previous_model(frequencies[unsolved]))
+            difference = difference.reshape(len(unsolved), -1).max(axis=1)
+
+        k = int(numpy.argmax(difference))
+        solve_index(unsolved[k])
+
+        error = numpy.max(numpy.abs(results[unsolved[k]] - prediction[k]))
+
+        if verbose:
+            print(
+                f"Rational model error at f = {frequencies[unsolved[k]]:.6g} Hz: {error:.3g}"
+            )
+
+        converged_solves = converged_solves + 1 if error < tolerance else 0
+
+        if converged_solves == 2:
+            break
+
+        previous_model = model
+
+    indices = numpy.array(sorted(results))
+    samples = numpy.array([results[i] for i in indices])
+
+    model = _rational_model(
+        frequencies=frequencies[indices],
+        samples=samples,
+        max_terms=(len(indices) + 1) // 2,
+    )
+
+    values = model(frequencies)
+
+    # The rational model is complex, keep real results real like `frequency_sweep`.
+    if numpy.isrealobj(samples):
+        values = values.real.astype(samples.dtype)
+
+    values[indices] = samples
+
+    return values
+
+
+def farm_frequency_sweep(
+    solve,
+    frequencies,
+    workers,
+    include=(),
+    launcher="pymufem",
+    is_main_process=True,
+    verbose=True,
+) -> numpy.ndarray:
+    """Splits the frequencies into `workers` slices which are solved by separate
+    processes at the same time.
+
+    The calling process launches `workers - 1` copies of the running script with
+    `launcher` (e.g. "mpirun -np 4 pymufem" to give each worker 4 ranks), which
+    set up their own simulation, i.e. load the mesh once, solve a contiguous
+    slice of frequencies with `frequency_sweep` and write the results to a
+    temporary directory. The calling process solves the first slice plus the
+    frequencies closest to those in `include` (e.g. the ones exporting fields),
+    and gathers everything into one array in the order of `frequencies`.
+
+    In a worker this function does not return, the worker exits once its slice
+    is written. The calling process has to run on a single rank.
+    """
+
+    frequencies = numpy.asarray(frequencies, dtype=float)
+
+    parent = {int(numpy.argmin(numpy.abs(frequencies - f))) for f in include}
+    others = [i for i in range(len(frequencies)) if i not in parent]
+
+    # Every worker gets at least one frequency.
+    workers = max(1, min(workers, len(others)))
+
+    slices = numpy.array_split(numpy.array(others, dtype=int), workers)
+    slices[0] = numpy.array(sorted(parent | set(slices[0].tolist())), dtype=int)
+
+    directory = os.environ.get("MUFEM_FREQUENCY_FARM_DIRECTORY")
+
+    if directory is not None:
+
+        worker = int(os.environ["MUFEM_FREQUENCY_FARM_WORKER"])
+        indices = slices[worker]
+
+        results = frequency_sweep(
+            solve=solve, frequencies=frequencies[indices], verbose=verbose
+        )
+
+        if is_main_process:
+            path = os.path.join(directory, f"worker_{worker}")
+            numpy.savez(f"{path}.tmp.npz", indices=indices, results=results)
+            os.replace(f"{path}.tmp.npz", f"{path}.npz")
+
+        sys.exit(0)
+
+    if not is_main_process:
+        raise RuntimeError("The frequency farm has to be started on a single rank.")
+
+    directory = tempfile.mkdtemp(prefix=".frequency_farm_", dir=os.getcwd())
+    processes = []
+
+    try:
+        for worker in range(1, workers):
+            env = dict(os.environ)
+            env["MUFEM_FREQUENCY_FARM_DIRECTORY"] = directory
+            env["MUFEM_FREQUENCY_FARM_WORKER"] = str(worker)
+
+            processes.append(
+                subprocess.Popen(args=shlex.split(launcher) + sys.argv, env=env)
+            )
+
+        results = frequency_sweep(
+            solve=solve, frequencies=frequencies[slices[0]], verbose=verbose
+        )
+
+        gathered = numpy.empty((len(frequencies),) + results.shape[1:], results.dtype)
+        gathered[slices[0]] = results
+
+        for worker, process in enumerate(processes, start=1):
+
+            if process.wait() != 0:
+                raise RuntimeError(
+                    f"Frequency worker {worker} failed with exit status "
+                    f"{process.returncode}."
+                )
+
+            with numpy.load(os.path.join(directory, f"worker_{worker}.npz")) as data:
+                gathered[data["indices"]] = data["results"]
+
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return gathered
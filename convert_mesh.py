@@ -0,0 +1,26 @@
+import argparse
+import time
+
+from common.meshes import read_mesh, write_gmsh_binary
+
+# Converts an MFEM mesh v1.3 (geometry.mesh, also gzip compressed) or an ASCII Gmsh
+# 2.2 file into a binary Gmsh 2.2 file, which loads without decompressing and
+# parsing text. The MFEM attribute sets become Gmsh physical names.
+parser = argparse.ArgumentParser(
+    description="Convert a mesh file into the binary Gmsh 2.2 format."
+)
+parser.add_argument("input", help="MFEM mesh v1.3 or Gmsh 2.2 file")
+parser.add_argument("output", help="binary Gmsh 2.2 file (.msh)")
+args = parser.parse_args()
+
+start_time = time.perf_counter()
+
+mesh = read_mesh(args.input)
+write_gmsh_binary(mesh=mesh, path=args.output)
+
+elements = sum(len(block.attributes) for block in mesh.blocks)
+
+print(
+    f"Converted {args.input} ({len(mesh.nodes)} nodes, {elements} elements) to "
+    f"{args.output} in {time.perf_counter() - start_time:.2f} s."
+)
@@ -1,8 +1,18 @@
+import argparse
+import csv
+import hashlib
+import json
 import os
-import sys
+import shlex
+import shutil
+import statistics
 import subprocess
+import sys
+import tempfile
+import time
 
-from typing import List
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
 
 # Temporary workaround for cases which currently do not support
 # parallel execution.
@@ -10,55 +20,670 @@ serial_only_cases = [
     "Electromagnetics/Lubin_2015_Axial_Flux_Eddy_Current_Brake",
 ]
 
+# Number of MPI ranks and OpenMP threads per rank for cases which should not
+# run with the command line defaults, e.g.
+#     "Electromagnetics/Compumag-Team24-Locked-Rotor": (4, 1),
+case_widths: Dict[str, Tuple[int, int]] = {}
 
-def run_cases(base_directory):
+# Number of recorded wall times kept per case in the history file.
+history_length = 5
+
+
+@dataclass
+class Case:
+    directory: str
+    ranks: int
+    threads: Optional[int]
+
+    @property
+    def case_path(self) -> str:
+        return f"{self.directory}/case.py"
+
+    @property
+    def cores(self) -> int:
+        return self.ranks * (self.threads or 1)
+
+
+@dataclass
+class CaseProfile:
+    case: str
+    ranks: int
+    threads: Optional[int]
+    returncode: int = 0
+    wall_time: float = 0.0  # [s]
+    user_time: float = 0.0  # [s] including all child processes, e.g. MPI ranks
+    system_time: float = 0.0  # [s]
+    peak_rss: int = 0  # [B] largest resident set of any single process
+    read_bytes: int = 0  # [B] read from the storage layer
+    write_bytes: int = 0  # [B] written to the storage layer
+
+
+@dataclass
+class RunningCase:
+    case: Case
+    process: subprocess.Popen
+    output: Optional[object]
+    start_time: float = field(default_factory=time.perf_counter)
+    proc_io: Dict[str, int] = field(default_factory=dict)
 
-    failed_cases: List[str] = []
+
+def find_cases(base_directory, ranks=1, threads=None) -> List[Case]:
+
+    cases: List[Case] = []
 
     # Walk through the directory structure
     for root, _, files in os.walk(top=base_directory):
         if "case.py" in files:
 
-            # Save the current working directory
-            # Note that we run the test in the local directory, so we
-            # can easily load the mesh. After the run the directory is
-            # restored so we can continue the os.walk.
-            original_dir = os.getcwd()
-
             case_path = f"{root}/case.py"
 
             if any(case in case_path for case in serial_only_cases):
                 print(f"Skipping serial-only case: {case_path}")
                 continue
 
-            print(f"Running case: {case_path}")
-
-            # Execute the command
-            try:
-                os.chdir(path=root)
-                args = "pymufem case.py"
-                _ = subprocess.run(args=args, shell=True, check=True, text=True)
-                print(f"Success: {case_path}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error running {case_path}: {e}")
-                failed_cases.append(object=case_path)
-            finally:
-                # Return to the original working directory
-                os.chdir(path=original_dir)
+            width = next(
+                (w for case, w in case_widths.items() if case in case_path),
+                (ranks, threads),
+            )
+
+            cases.append(Case(directory=root, ranks=width[0], threads=width[1]))
+
+    return sorted(cases, key=lambda case: case.directory)
+
+
+def load_history(history_path) -> Dict[str, List[float]]:
+
+    if history_path is None or not os.path.exists(history_path):
+        return {}
+
+    with open(history_path) as fp:
+        return json.load(fp)
+
+
+def save_history(history_path, history: Dict[str, List[float]]):
+
+    if history_path is None:
+        return
+
+    # Write to a temporary file first so an interrupted run cannot leave a
+    # truncated history behind.
+    with open(f"{history_path}.tmp", "w") as fp:
+        json.dump(history, fp, indent=2, sort_keys=True)
+    os.replace(f"{history_path}.tmp", history_path)
+
+
+def expected_wall_time(history: Dict[str, List[float]], key: str) -> float:
+
+    wall_times = sorted(history.get(key, []))
+
+    # Cases without history are started first, as they could be the longest.
+    if not wall_times:
+        return float("inf")
+
+    return wall_times[len(wall_times) // 2]
+
+
+def longest_first(cases: List[Case], history, base_directory) -> List[Case]:
+    """Orders the cases by their recorded median wall time, longest first.
+
+    Together with the backfilling in run_cases this is the longest processing
+    time first heuristic, which keeps cores from idling at the end of the run.
+    """
+
+    def key(case: Case):
+        wall_time = expected_wall_time(
+            history=history, key=os.path.relpath(case.directory, base_directory)
+        )
+        return (-wall_time, -case.cores)
+
+    return sorted(cases, key=key)
+
+
+def start_case(case: Case, mpi_launcher: str, output):
+
+    args = ["pymufem", "case.py"]
+
+    if case.ranks > 1:
+        args = shlex.split(mpi_launcher.format(ranks=case.ranks)) + args
+
+    env = dict(os.environ)
+
+    if case.threads is not None:
+        env["OMP_NUM_THREADS"] = str(case.threads)
+
+    # Note that we run the test in the local directory, so we can easily load
+    # the mesh.
+    return subprocess.Popen(
+        args=args, cwd=case.directory, env=env, stdout=output, stderr=output
+    )
+
+
+def read_proc_io(pid: int) -> Dict[str, int]:
+
+    # Only available on Linux. Once the case has reaped its children (e.g.
+    # mpirun its ranks) their I/O is included in the counters as well.
+    try:
+        with open(f"/proc/{pid}/io") as fp:
+            return {key: int(value) for key, value in (line.split(":") for line in fp)}
+    except (OSError, ValueError):
+        return {}
+
+
+def wait_case(running: RunningCase) -> Optional[CaseProfile]:
+    """Reaps the case process if it has finished and returns its profile.
+
+    The resource usage returned by wait4 covers the case process and all its
+    descendants, while /proc is sampled on every call as it disappears with the
+    process.
+    """
+
+    pid, status, rusage = os.wait4(running.process.pid, os.WNOHANG)
+
+    if pid == 0:
+        running.proc_io = read_proc_io(pid=running.process.pid) or running.proc_io
+        return None
+
+    running.process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is reported in kilobytes on Linux, but in bytes on macOS.
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+
+    return CaseProfile(
+        case=running.case.case_path,
+        ranks=running.case.ranks,
+        threads=running.case.threads,
+        returncode=running.process.returncode,
+        wall_time=time.perf_counter() - running.start_time,
+        user_time=rusage.ru_utime,
+        system_time=rusage.ru_stime,
+        peak_rss=rusage.ru_maxrss * rss_unit,
+        read_bytes=max(running.proc_io.get("read_bytes", 0), 512 * rusage.ru_inblock),
+        write_bytes=max(running.proc_io.get("write_bytes", 0), 512 * rusage.ru_oublock),
+    )
+
+
+def write_report(report_path, profiles: List[CaseProfile]):
+
+    rows = [asdict(profile) for profile in profiles]
+
+    with open(report_path, "w", newline="") as fp:
+        if report_path.endswith(".csv"):
+            writer = csv.DictWriter(
+                fp, fieldnames=[f.name for f in fields(CaseProfile)]
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, fp, indent=2)
+
+
+def mufem_version() -> str:
+
+    version_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "VERSION")
+
+    with open(version_path) as fp:
+        return fp.read().strip()
+
+
+def median_and_mad(values: List[float]) -> Tuple[float, float]:
+
+    median = statistics.median(values)
+
+    # The median absolute deviation scaled to match the standard deviation of
+    # normally distributed timings, but insensitive to single outliers.
+    mad = 1.4826 * statistics.median([abs(value - median) for value in values])
+
+    return median, mad
+
+
+def summarize_profiles(profiles: List[CaseProfile], base_directory) -> Dict[str, Dict]:
+
+    samples: Dict[str, List[CaseProfile]] = {}
+
+    for profile in profiles:
+        if profile.returncode == 0:
+            key = os.path.relpath(profile.case, base_directory)
+            samples.setdefault(key, []).append(profile)
+
+    summary: Dict[str, Dict] = {}
+
+    for key, case_profiles in samples.items():
+
+        wall_time, wall_time_mad = median_and_mad(
+            values=[profile.wall_time for profile in case_profiles]
+        )
+
+        summary[key] = {
+            "samples": len(case_profiles),
+            "wall_time": wall_time,
+            "wall_time_mad": wall_time_mad,
+            "peak_rss": statistics.median(
+                [profile.peak_rss for profile in case_profiles]
+            ),
+        }
+
+    return summary
+
+
+def save_baseline(baseline_path, summary: Dict[str, Dict]):
+
+    with open(baseline_path, "w") as fp:
+        json.dump(
+            {"mufem_version": mufem_version(), "cases": summary},
+            fp,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def compare_with_baseline(baseline_path, summary: Dict[str, Dict], tolerance):
+    """Returns the cases which got slower or use more memory than the baseline.
+
+    A case regresses if its median exceeds the baseline median by more than the
+    relative tolerance plus three times the noise (MAD) of both measurements.
+    """
+
+    with open(baseline_path) as fp:
+        baseline = json.load(fp)
+
+    print(
+        f"\nComparing against baseline of mufem {baseline['mufem_version']} "
+        f"(running {mufem_version()}):"
+    )
+
+    regressions: List[str] = []
+
+    for key, current in sorted(summary.items()):
+
+        reference = baseline["cases"].get(key)
+
+        if reference is None:
+            print(f"  {key}: no baseline")
+            continue
+
+        noise = 3.0 * (reference["wall_time_mad"] + current["wall_time_mad"])
+        wall_time_limit = reference["wall_time"] * (1.0 + tolerance) + noise
+        peak_rss_limit = reference["peak_rss"] * (1.0 + tolerance)
+
+        slower = current["wall_time"] > wall_time_limit
+        larger = current["peak_rss"] > peak_rss_limit
+
+        print(
+            f"  {key}: wall time {current['wall_time']:.1f} s "
+            f"(baseline {reference['wall_time']:.1f} s"
+            f"{', REGRESSION' if slower else ''}), "
+            f"peak RSS {current['peak_rss'] / 2**20:.0f} MB "
+            f"(baseline {reference['peak_rss'] / 2**20:.0f} MB"
+            f"{', REGRESSION' if larger else ''})"
+        )
+
+        if slower or larger:
+            regressions.append(key)
+
+    return regressions
+
+
+def case_inputs(directory) -> List[str]:
+
+    # The case scripts (including the ones generating the mesh), the mesh and
+    # the tabulated input data.
+    inputs = [
+        name
+        for name in os.listdir(directory)
+        if name.endswith(".py") or name.startswith("geometry.")
+    ]
+
+    for root, _, files in os.walk(top=os.path.join(directory, "data")):
+        inputs += [
+            os.path.relpath(os.path.join(root, name), directory) for name in files
+        ]
+
+    return sorted(inputs)
+
+
+def cache_key(case: Case) -> str:
+
+    digest = hashlib.sha256()
+    digest.update(mufem_version().encode())
+
+    # The helpers shared by all cases are part of every case's inputs.
+    common_directory = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "common"
+    )
+
+    paths = [os.path.join(case.directory, name) for name in case_inputs(case.directory)]
+    paths += [
+        os.path.join(common_directory, name)
+        for name in sorted(os.listdir(common_directory))
+        if name.endswith(".py")
+    ]
+
+    for path in paths:
+        digest.update(f"\0{os.path.relpath(path, case.directory)}\0".encode())
+        with open(path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(2**20), b""):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def restore_from_cache(cache_directory, key: str, case: Case) -> bool:
+
+    cached_results = os.path.join(cache_directory, key, "results")
+
+    if not os.path.isdir(cached_results):
+        return False
+
+    shutil.copytree(
+        cached_results, os.path.join(case.directory, "results"), dirs_exist_ok=True
+    )
+
+    return True
+
+
+def store_in_cache(cache_directory, key: str, case: Case):
+
+    results = os.path.join(case.directory, "results")
+
+    if not os.path.isdir(results):
+        return
+
+    # Copy next to the final location first, so that an interrupted copy is
+    # never mistaken for a complete cache entry.
+    entry = os.path.join(cache_directory, key)
+    shutil.rmtree(f"{entry}.tmp", ignore_errors=True)
+    shutil.copytree(results, os.path.join(f"{entry}.tmp", "results"))
+
+    with open(os.path.join(f"{entry}.tmp", "case"), "w") as fp:
+        fp.write(os.path.abspath(case.directory))
+
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(f"{entry}.tmp", entry)
+
+    # Only the latest entry of a case is kept, so the cache does not grow with
+    # every change of the inputs.
+    for name in os.listdir(cache_directory):
+
+        case_file = os.path.join(cache_directory, name, "case")
+
+        if name == key or not os.path.isfile(case_file):
+            continue
+
+        with open(case_file) as fp:
+            if fp.read() == os.path.abspath(case.directory):
+                shutil.rmtree(os.path.join(cache_directory, name), ignore_errors=True)
+
+
+def run_cases(
+    base_directory,
+    cores=1,
+    ranks=1,
+    threads=None,
+    mpi_launcher="mpirun -np {ranks}",
+    history_path=None,
+    report_path=None,
+    repeat=1,
+    save_baseline_path=None,
+    baseline_path=None,
+    tolerance=0.1,
+    fail_on_regression=False,
+    cache_directory=None,
+    force=False,
+):
+
+    cases = find_cases(base_directory=base_directory, ranks=ranks, threads=threads)
+
+    cache_keys: Dict[str, str] = {}
+
+    if cache_directory is not None:
+
+        for case in list(cases):
+
+            cache_keys[case.directory] = cache_key(case=case)
+
+            if force:
+                continue
+
+            if restore_from_cache(
+                cache_directory=cache_directory,
+                key=cache_keys[case.directory],
+                case=case,
+            ):
+                print(f"Restored from cache: {case.case_path}")
+                cases.remove(case)
+
+    history = load_history(history_path=history_path)
+    cases = longest_first(cases=cases, history=history, base_directory=base_directory)
+
+    # With more than one core the cases run side by side, so their output is
+    # buffered and printed once a case has finished.
+    buffer_output = cores > 1
+
+    failed_cases: List[str] = []
+    profiles: List[CaseProfile] = []
+
+    # For benchmarking every case is queued several times, each repetition is an
+    # independent run of the case.
+    pending = [case for case in cases for _ in range(repeat)]
+    running: List[RunningCase] = []
+    free_cores = cores
+
+    while pending or running:
+
+        # Start every pending case which fits into the remaining core budget. A
+        # case wider than the whole budget is started once nothing else runs. The
+        # cases write into their directory, so two copies of a case (e.g. its
+        # repetitions) never run at the same time.
+        for case in list(pending):
+            if any(r.case.directory == case.directory for r in running):
+                continue
+
+            if case.cores <= free_cores or not running:
+
+                print(f"Running case: {case.case_path} ({case.cores} cores)")
+
+                output = tempfile.TemporaryFile() if buffer_output else None
+                process = start_case(
+                    case=case, mpi_launcher=mpi_launcher, output=output
+                )
+
+                pending.remove(case)
+                running.append(RunningCase(case=case, process=process, output=output))
+                free_cores -= case.cores
+
+        time.sleep(0.1)
+
+        for running_case in list(running):
+
+            profile = wait_case(running=running_case)
+
+            if profile is None:
+                continue
+
+            case = running_case.case
+            output = running_case.output
+
+            running.remove(running_case)
+            free_cores += case.cores
+            profiles.append(profile)
+
+            if output is not None:
+                output.seek(0)
+                sys.stdout.write(output.read().decode(errors="replace"))
+                output.close()
+
+            if profile.returncode == 0:
+                print(
+                    f"Success: {case.case_path} ({profile.wall_time:.1f} s wall, "
+                    f"{profile.user_time + profile.system_time:.1f} s CPU, "
+                    f"{profile.peak_rss / 2**20:.0f} MB peak RSS)"
+                )
+
+                key = os.path.relpath(case.directory, base_directory)
+                wall_times = history.get(key, []) + [profile.wall_time]
+                history[key] = wall_times[-history_length:]
+                save_history(history_path=history_path, history=history)
+
+                if case.directory in cache_keys:
+                    store_in_cache(
+                        cache_directory=cache_directory,
+                        key=cache_keys.pop(case.directory),
+                        case=case,
+                    )
+            else:
+                print(
+                    f"Error running {case.case_path}: "
+                    f"exit status {profile.returncode}"
+                )
+                failed_cases.append(case.case_path)
+
+    if report_path is not None:
+        write_report(report_path=report_path, profiles=profiles)
+
+    summary = summarize_profiles(profiles=profiles, base_directory=base_directory)
+
+    if save_baseline_path is not None:
+        save_baseline(baseline_path=save_baseline_path, summary=summary)
+
+    regressions: List[str] = []
+
+    if baseline_path is not None:
+        regressions = compare_with_baseline(
+            baseline_path=baseline_path, summary=summary, tolerance=tolerance
+        )
 
     if failed_cases:
         print("\nThe following cases failed:")
-        for case in failed_cases:
-            print(case)
-        sys.exit(status=1)
+        for case_path in failed_cases:
+            print(case_path)
+        sys.exit(1)
+
+    if regressions:
+        print("\nThe following cases regressed against the baseline:")
+        for key in regressions:
+            print(key)
+        if fail_on_regression:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
 
-    if len(sys.argv) > 1:
-        base_directory = sys.argv[1]
-    else:
-        base_directory = "."
-    print(f"Running cases in directory: {base_directory}")
+    parser = argparse.ArgumentParser(description="Run the validation cases.")
+    parser.add_argument("base_directory", nargs="?", default=".")
+    parser.add_argument(
+        "--cores",
+        type=int,
+        default=1,
+        help="Total number of cores the cases may use at the same time "
+        "(0 uses all cores of the machine). Default runs the cases one by one.",
+    )
+    parser.add_argument(
+        "--ranks", type=int, default=1, help="Default number of MPI ranks per case."
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Default number of OpenMP threads per rank (sets OMP_NUM_THREADS). "
+        "Defaults to 1 when several cases run at the same time.",
+    )
+    parser.add_argument(
+        "--mpi-launcher",
+        default="mpirun -np {ranks}",
+        help="Command prefix used for cases with more than one rank.",
+    )
+    parser.add_argument(
+        "--history",
+        default=None,
+        help="File recording the wall time of each case, used to start the longest "
+        "cases first (default: .run_cases_history.json in the base directory).",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Neither read nor write the wall time history.",
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Write the wall time, CPU time, peak memory and I/O of every case to "
+        "this file (CSV if the name ends with .csv, JSON otherwise).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Run every case this many times, e.g. to benchmark against a baseline.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        default=None,
+        help="Store the median wall time and peak memory of every case in this file.",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Compare the median wall time and peak memory of every case against "
+        "a file written with --save-baseline.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative slowdown or memory growth accepted against the baseline.",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with an error instead of a warning if a case regressed.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory caching the results of every case, keyed on a hash of its "
+        "inputs (default: .run_cases_cache in the base directory).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run all cases even if their results are cached.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither restore nor store cached results.",
+    )
+    args = parser.parse_args()
+
+    cache_directory = args.cache_dir or os.path.join(
+        args.base_directory, ".run_cases_cache"
+    )
+
+    # Benchmarks have to run the cases, but may still refresh the cache.
+    benchmark = args.repeat > 1 or args.save_baseline or args.baseline
+
+    history_path = args.history or os.path.join(
+        args.base_directory, ".run_cases_history.json"
+    )
+
+    cores = args.cores if args.cores > 0 else os.cpu_count()
+    threads = args.threads if args.threads is not None or cores == 1 else 1
+
+    print(f"Running cases in directory: {args.base_directory}")
 
-    run_cases(base_directory=base_directory)
+    run_cases(
+        base_directory=args.base_directory,
+        cores=cores,
+        ranks=args.ranks,
+        threads=threads,
+        mpi_launcher=args.mpi_launcher,
+        history_path=None if args.no_history else history_path,
+        report_path=args.report,
+        repeat=args.repeat,
+        save_baseline_path=args.save_baseline,
+        baseline_path=args.baseline,
+        tolerance=args.tolerance,
+        fail_on_regression=args.fail_on_regression,
+        cache_directory=None if args.no_cache else cache_directory,
+        force=args.force or bool(benchmark),
+    )